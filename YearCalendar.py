@@ -17,14 +17,17 @@ Please respect the Python syntax.
 2) You can choose your font from the list of fonts available on your system. 
 Please check if all special characters for your language are available in the chosen font! 
 You can change fonts of many items afterwards in the Styles menu (Edit - Styles).
-3) Calendar year, start month and week starting day are to be given. Saturdays and Sundays will 
-be printed in separate colors (many colors can be changed afterwards with Edit - Colors and Fills).
+3) Calendar year, start month and week starting day are to be given. Weekend days (Saturday
+and Sunday, or e.g. Friday and Saturday) will be printed in separate colors (many colors can be changed afterwards with Edit - Colors and Fills).
 4) Option to show week numbers with (or without) a week numbers heading in 
 your local language. Calendar week numbers will be printed in dark gray.
-5) Option to import holidays, special days and vacation dates from a 'holidays.txt' file. 
+5) Option to import holidays, special days and vacation dates from one or more 'holidays.txt' files. 
 The 'holidays.txt' file from MonthlyCalendar script can be used here. See the example
 holiday.txt-file for the layout. 
-Automatic calculation of the holiday dates for each calendar year. 
+Automatic calculation of the holiday dates for each calendar year.
+Dates of a later file replace the same kind of dates of the files before it.
+iCalendar (.ics) files can be imported too; see the 'icsCategories' list in the script. 
+The files are read in the background while you fill in the dialog.
 6) Number of months per row determines the layout of the 12-month calendar.
 7) You can position the 12-month calendar within your document.
 8) Option to draw an empty image frame within the top and / or left 'offset' area and to get an 
@@ -32,54 +35,106 @@ Automatic calculation of the holiday dates for each calendar year.
 9) Option to generate a text frame at the bottom with the holiday dates and texts.
 10) You can easily change the text styles, colors and fills of month title, weekday names, 
 week numbers, weekends, holidays, normal dates, special dates, vacation and grids.
+11) A preview of the layout is shown in the dialog and follows every change of the options.
+The page size and margins of the new document are set in the dialog too.
+12) Option to draw one month and clone it for the other months, which is much faster.
+13) Option to fill the page with copies of a card calendar (e.g. credit card size), 
+with bleed, gutter and crop marks.
+14) Without Scribus the script writes the calendar as SVG (and as PDF if the reportlab
+package is installed), e.g. for proofs and web previews:
+python YearCalendar.py --year 2025 --holidays holidays.txt --svg calendar.svg
+15) Option to show the principal moon phases (Symbola glyphs) and the sunrise and
+sunset of a place of the 'locations' list, on a layer of their own.
+16) The dialog shows the progress while the calendar is drawn; Cancel stops the drawing
+and removes the partly drawn calendar.
 Many build-in controls.
 
 Parts of this script are taken from the MonthlyCalendar script for Scribus.
 """
 ######################################################
-# imports
+# imports: only the modules of the chosen mode are loaded here, the others
+# (holidays files and cache, SVG / PDF, command line) where they are used
 from __future__ import division # overrules Python 2 integer division
 import sys
+import time
+loadStart = time.perf_counter() # see the --benchmark option
+import types
 import locale
 import calendar
 import datetime
+import math
 from datetime import date, timedelta
-import csv
-import platform
+from collections import namedtuple
+from os import makedirs, replace, stat
+from os.path import abspath, expanduser, join
 
 try:
     from scribus import *
-except ImportError:
-    print("This Python script is written for the Scribus \
-      scripting interface.")
-    print("It can only be run from within Scribus.")
-    sys.exit(1)
-
-os = platform.system()
-if os != "Windows" and os != "Linux":
-    print("Your Operating System is not supported by this script.")
-    messageBox("Script failed",
-        "Your Operating System is not supported by this script.",
-        ICON_CRITICAL)	
-    sys.exit(1)
-
-python_version = platform.python_version()
-if python_version[0:1] != "3":
-    print("This script runs only with Python 3.")
-    messageBox("Script failed",
-        "This script runs only with Python 3.",
-        ICON_CRITICAL)	
-    sys.exit(1)
+    inScribus = True
+except ImportError: # only the SVG / PDF output can be used, see commandLine()
+    inScribus = False
+    ICON_CRITICAL = 0
+    def messageBox(caption, message, icon=ICON_CRITICAL):
+        """ Outside Scribus the warnings are only printed. """
+        return 0
 
-try:
-    from tkinter import * # python 3
-    from tkinter import messagebox, filedialog, font
-except ImportError:
-    print("This script requires Python Tkinter properly installed.")
-    messageBox('Script failed',
-               'This script requires Python Tkinter properly installed.',
-               ICON_CRITICAL)
-    sys.exit(1)
+if sys.platform.startswith("win"):
+    os = "Windows"
+elif sys.platform.startswith("linux"):
+    os = "Linux"
+else:
+    os = sys.platform
+
+haveTkinter = False
+if inScribus: # the dialog; the SVG / PDF output does not load tkinter
+    try:
+        from tkinter import * # python 3
+        from tkinter import messagebox, filedialog, font
+        import threading
+        import queue
+        haveTkinter = True
+    except ImportError:
+        pass
+if not haveTkinter:
+    Frame = object
+
+def scriptSession():
+    """ State that is kept when the script runs again in the same Python,
+        e.g. in one Scribus session: the checks below and the computed tables. """
+    session = sys.modules.get("YearCalendarSession")
+    if session is None:
+        session = types.ModuleType("YearCalendarSession")
+        session.checked = False
+        session.astroCache = dict()
+        sys.modules["YearCalendarSession"] = session
+    return session
+
+def checkEnvironment():
+    """ Operating system, Python and Tkinter checks of the Scribus dialog, done
+        once per session. Returns False (after a message) if the script can not run. """
+    session = scriptSession()
+    if session.checked:
+        return True
+    if os != "Windows" and os != "Linux":
+        print("Your Operating System is not supported by this script.")
+        messageBox("Script failed",
+            "Your Operating System is not supported by this script.",
+            ICON_CRITICAL)	
+        return False
+    if sys.version_info[0] != 3:
+        print("This script runs only with Python 3.")
+        messageBox("Script failed",
+            "This script runs only with Python 3.",
+            ICON_CRITICAL)	
+        return False
+    if not haveTkinter:
+        print("This script requires Python Tkinter properly installed.")
+        messageBox('Script failed',
+                   'This script requires Python Tkinter properly installed.',
+                   ICON_CRITICAL)
+        return False
+    session.checked = True
+    return True
 
 ######################################################
 # you can insert additional languages and unicode pages in the 'localization'-list below:
@@ -109,6 +164,132 @@ localization = [['Bulgarian', 'CP1251', 'bg_BG.UTF8'],
     ['Spanish', 'CP1252', 'es_ES.UTF8'], 
     ['Swedish', 'CP1252', 'sv_SE.UTF8']]
 
+######################################################
+# weekends: bit mask of the weekend days (Monday = 1, Tuesday = 2, Wednesday = 4, Thursday = 8,
+# Friday = 16, Saturday = 32, Sunday = 64). You can insert additional weekends below:
+weekendMasks = [['Saturday and Sunday', 96],
+    ['Friday and Saturday', 48],
+    ['Thursday and Friday', 24],
+    ['Friday', 16],
+    ['Sunday', 64],
+    ['None', 0]]
+
+######################################################
+# iCalendar (.ics) categories and the kind of date they are imported as: '1' holiday,
+# '0' special date, '' vacation. You can insert additional categories below (in capitals).
+# Events without a known category are holidays (one day) or vacation (more days).
+icsCategories = [['HOLIDAY', '1'],
+    ['HOLIDAYS', '1'],
+    ['PUBLIC HOLIDAY', '1'],
+    ['BANK HOLIDAY', '1'],
+    ['SPECIAL', '0'],
+    ['SPECIAL DAY', '0'],
+    ['ANNIVERSARY', '0'],
+    ['BIRTHDAY', '0'],
+    ['VACATION', ''],
+    ['SCHOOL HOLIDAY', ''],
+    ['SCHOOL HOLIDAYS', ''],
+    ['SCHOOL VACATION', '']]
+
+######################################################
+# places for the sunrise and sunset times: name, latitude (north +), longitude (east +),
+# time zone (hours from UTC) and daylight saving time ('EU', 'US' or '' for none).
+# You can insert additional places below:
+locations = [['Amsterdam', 52.37, 4.90, 1, 'EU'],
+    ['Berlin', 52.52, 13.40, 1, 'EU'],
+    ['Brussels', 50.85, 4.35, 1, 'EU'],
+    ['Chicago', 41.88, -87.63, -6, 'US'],
+    ['Helsinki', 60.17, 24.94, 2, 'EU'],
+    ['London', 51.51, -0.13, 0, 'EU'],
+    ['Los Angeles', 34.05, -118.24, -8, 'US'],
+    ['Madrid', 40.42, -3.70, 1, 'EU'],
+    ['Moscow', 55.76, 37.62, 3, ''],
+    ['New York', 40.71, -74.01, -5, 'US'],
+    ['Paris', 48.86, 2.35, 1, 'EU'],
+    ['Prague', 50.08, 14.44, 1, 'EU'],
+    ['Rome', 41.90, 12.50, 1, 'EU'],
+    ['Stockholm', 59.33, 18.07, 1, 'EU'],
+    ['Tokyo', 35.68, 139.69, 9, '']]
+
+# Symbola glyphs of the principal moon phases: new moon, first quarter, full moon, last quarter
+moonGlyphs = ["\U0001F311", "\U0001F313", "\U0001F315", "\U0001F317"]
+
+######################################################
+# default calendar colors (CMYK, 0-255). They can be changed afterwards with Edit - Colors and Fills.
+calendarColors = [
+    ("Black", 0, 0, 0, 255),
+    ("White", 0, 0, 0, 0),
+    ("fillMonthHeading", 0, 0, 0, 0), # default is White
+    ("txtMonthHeading", 0, 0, 0, 255), # default is Black
+    ("fillDayNames", 0, 0, 0, 200), # default is Dark Grey
+    ("txtDayNames", 0, 0, 0, 0), # default is White
+    ("fillWeekNo", 0, 0, 0, 200), # default is Dark Grey
+    ("txtWeekNo", 0, 0, 0, 0), # default is White
+    ("fillDate", 0, 0, 0, 0), # default is White
+    ("txtDate", 0, 0, 0, 255), # default is Black
+    ("fillWeekend", 0, 0, 0, 25), # default is Light Grey
+    ("fillWeekend2", 0, 0, 0, 25), # default is Light Grey
+    ("txtWeekend", 0, 0, 0, 200), # default is Dark Grey
+    ("fillHoliday", 0, 0, 0, 25), # default is Light Grey
+    ("txtHoliday", 0, 234, 246, 0), # default is Red
+    ("fillSpecialDate", 0, 0, 0, 0), # default is White
+    ("txtSpecialDate", 0, 0, 0, 128), # default is Middle Grey
+    ("fillVacation", 0, 0, 0, 25), # default is Light Grey
+    ("txtVacation", 0, 0, 0, 255), # default is Black
+    ("gridColor", 0, 0, 0, 128), # default is Middle Grey
+    ("gridMonthHeading", 0, 0, 0, 0), # default is White
+    ("gridDayNames", 0, 0, 0, 128), # default is Middle Grey
+    ("gridWeekNo", 0, 0, 0, 128), # default is Middle Grey
+    ("txtMoon", 0, 0, 0, 200), # default is Dark Grey
+    ("txtSun", 0, 128, 230, 25)] # default is Orange
+
+def colorHex(colorName):
+    """ Convert a calendar color to a '#rrggbb' string for screen previews. """
+    for color in calendarColors:
+        if color[0] == colorName:
+            k = 255 - color[4]
+            return "#%02x%02x%02x" % tuple(int((255 - c) * k / 255) for c in color[1:4])
+    return "#000000"
+
+# one calendar cell: position and size (pt), text, paragraph style, line style,
+# fill color and text color (None if the color of the paragraph style is used)
+Cell = namedtuple('Cell', 'x y w h text pStyle lineStyle fill txtColor')
+
+class CalendarCancelled(Exception):
+    """ Raised between two chunks of drawing when the user cancelled. """
+
+def buildHolidayIndex(holidaysList):
+    """ Holidays per date: (year, 'month', 'day') -> holidays in list order. """
+    index = dict()
+    for holiday in holidaysList:
+        index.setdefault((holiday[0], holiday[1], holiday[2]), []).append(holiday)
+    return index
+
+######################################################
+# parsed holidays files and their dates per year are cached here
+holidaysCacheDir = join(expanduser("~"), ".cache", "ScribusYearCalendar")
+
+# moon phases and sun times per (year, location), see calcAstro
+astroCache = scriptSession().astroCache
+
+def astroTables(year, location=None):
+    """ Moon phases and sun times of a year, computed once per year and location. """
+    key = (year, None if location is None else tuple(location))
+    if key not in astroCache:
+        astroCache[key] = calcAstro(year, location).tables()
+    return astroCache[key]
+
+def setCalendarLocale(lang):
+    """ Use the month and day names of a language of the localization list.
+        Raises locale.Error if the language is not installed. """
+    if os == "Windows":
+        x = lang
+    else: # Linux
+        iy = [[x[0] for x in localization].index(lang)]
+        x = (localization[iy[0]][2])
+    locale.setlocale(locale.LC_CTYPE, x)
+    locale.setlocale(locale.LC_TIME, x)
+
 ######################################################
 class ScYearCalendar:
     """ Calendar matrix creator itself. """
@@ -116,7 +297,10 @@ class ScYearCalendar:
     def __init__(self, year, months = [], nrHmonths = 0, firstDay = calendar.SUNDAY,
                 weekNr=True, weekNrHd="Wk", offsetX=0.0, marginX=0.0, offsetY=0.0,
                 marginY=0.0, drawImg=True,  drawLegend=True, cFont='Symbola Regular',
-                lang='English', holidaysList = list()):
+                lang='English', holidaysList = list(), cloneMonths=False, cardW=0.0,
+                cardH=0.0, bleed=0.0, gutter=0.0, cropMarks=False, weekendMask=96,
+                holidayIndex=None, moonPhases=False, location=None, onProgress=None,
+                pageSize=None, pageMargins=None):
         """ Setup basic things """
         # params
         self.year = year
@@ -133,7 +317,24 @@ class ScYearCalendar:
         self.marginY = marginY
         self.drawImg = drawImg # draw placeholder for image or logo (between margins and offsetX / offsetY)
         self.drawLegend = drawLegend # create text frame with holiday texts at bottom or at right side
+        self.cloneMonths = cloneMonths # duplicate one styled month instead of styling every frame
+        self.cardW = cardW # card size: if not 0, the page is filled with copies of a card calendar
+        self.cardH = cardH
+        self.bleed = bleed # around each card
+        self.gutter = gutter # space between the bleeds of the cards
+        self.cropMarks = cropMarks
+        self.moonPhases = moonPhases # moon phase glyphs in the date cells
+        self.location = location # sunrise and sunset in the month headings (entry of 'locations')
+        self.onProgress = onProgress # called with drawn and total cells between the chunks of
+                                     # drawing, returns True to cancel the calendar
+        self.cellsDone = 0
+        self.cellsTotal = 0
+        self.pageSize = pageSize # width, height (pt) of the new document, None: ask the user
+        self.pageMargins = pageMargins # top, left, right, bottom (pt) as getPageMargins
         self.holidaysList = holidaysList #imported and converted from '*holidays.txt' (or empty list)
+        if holidayIndex is None:
+            holidayIndex = buildHolidayIndex(holidaysList)
+        self.holidayIndex = holidayIndex # holidays per date
         if len(self.holidaysList) != 0:
             self.drawHolidays = True
         else:
@@ -151,13 +352,21 @@ class ScYearCalendar:
                 self.dayOrder.append((calendar.day_abbr[i][:1]).upper())
             except UnicodeError: # for Greek, Russian, etc.
                 self.dayOrder.append((calendar.day_abbr[i][:2]).upper())
-        if firstDay == calendar.SUNDAY:
-            dl = self.dayOrder[:6]
-            dl.insert(0, self.dayOrder[6])
-            self.dayOrder = dl
+        self.dayOrder = self.dayOrder[firstDay:] + self.dayOrder[:firstDay]
         self.mycal = calendar.Calendar(firstDay)
+        # weekday column of a week -> fill and text color of a date and fill of
+        # previous or next month dates, for the weekend days of 'weekendMask'
+        self.weekendMask = weekendMask
+        self.dayColumns = []
+        for pos in range(7):
+            if weekendMask & (1 << ((firstDay + pos) % 7)): # weekend day
+                self.dayColumns.append(("fillWeekend", "txtWeekend", "fillWeekend2"))
+            else:
+                self.dayColumns.append(("fillDate", None, "fillDate"))
         # layers
         self.layerCal = 'Calendar'
+        self.layerAstro = 'Moon and sun'
+        self.astroNames = [] # frames of the moon and sun layer
         # character styles
         self.cStylMonthHeading = "char_style_MonthHeading"
         self.cStylDayNames = "char_style_DayNames"
@@ -165,6 +374,8 @@ class ScYearCalendar:
         self.cStylHolidays = "char_style_Holidays"
         self.cStylDate = "char_style_Date"
         self.cStylLegend = "char_style_Legend"
+        self.cStylMoon = "char_style_Moon"
+        self.cStylSun = "char_style_Sun"
         # paragraph styles
         self.pStyleMonthHeading = "par_style_MonthHeading"
         self.pStyleDayNames = "par_style_DayNames"
@@ -172,49 +383,125 @@ class ScYearCalendar:
         self.pStyleHolidays = "par_style_Holidays"
         self.pStyleDate = "par_style_Date"
         self.pStyleLegend = "par_style_Legend"
+        self.pStyleMoon = "par_style_Moon"
+        self.pStyleSunrise = "par_style_Sunrise"
+        self.pStyleSunset = "par_style_Sunset"
         # line styles
         self.gridLineStyle = "grid_Line_Style"
         self.gridLineStyleDayNames = "grid_DayNames_Style"
         self.gridLineStyleWeekNo = "grid_WeekNo_Style"
         self.gridLineStyleMonthHeading = "grid_MonthHeading_Style"
+        # colors of styles, used by previews
+        self.styleTxtColors = {self.pStyleMonthHeading: "txtMonthHeading",
+            self.pStyleDayNames: "txtDayNames", self.pStyleWeekNo: "txtWeekNo",
+            self.pStyleHolidays: "txtHoliday", self.pStyleDate: "txtDate",
+            self.pStyleLegend: "txtDate", self.pStyleMoon: "txtMoon",
+            self.pStyleSunrise: "txtSun", self.pStyleSunset: "txtSun"}
+        self.lineStyleColors = {self.gridLineStyle: "gridColor",
+            self.gridLineStyleDayNames: "gridDayNames",
+            self.gridLineStyleWeekNo: "gridWeekNo",
+            self.gridLineStyleMonthHeading: "gridMonthHeading"}
         # other settings
         calendar.setfirstweekday(firstDay)
-        progressTotal(len(months))
 
     def createCalendar(self):
         """ Walk through months """
-        if not newDocDialog():
-            return 'Create a new document'
+        if self.pageSize is None:
+            if not newDocDialog():
+                return 'Create a new document'
+        else: # the page of the preview in the dialog
+            top, left, right, bottom = self.pageMargins
+            if not newDocument(tuple(self.pageSize), (left, right, top, bottom), PORTRAIT, 1,
+                    UNIT_POINTS, NOFACINGPAGES, FIRSTPAGERIGHT, 1):
+                return 'Create a new document'
         originalUnit = getUnit()
         setUnit(UNIT_POINTS)
-        self.setupDocVariables()
-        setActiveLayer(self.layerCal)
-        run = 0
-        nextYr = False
-        self.nrHmthsCnt = self.nrHmonths # counter for number of horizontal months
-        nrVmthsCnt = 0 # counter for number of vertical months
-        for i in self.months: # loop for creating the months
-            run += 1
-            progressSet(run)
-            j = self.months[0] + run
-            if (j > 13) and (nextYr == False):
-                self.year = self.year + 1
-                nextYr = True # self.year is meanwhile next year
-            if self.nrHmthsCnt == self.nrHmonths:
-                 self.rowCnt = nrVmthsCnt * 9
-                 nrVmthsCnt += 1
-                 self.nrHmthsCnt = 0
+        if self.cardW > 0 and len(self.cardSlots(*self.pageArea())) == 0:
+            setUnit(originalUnit)
+            return 'The card does not fit within the page margins'
+        setRedraw(False) # no canvas and palette updates while the frames are created
+        hiddenLayers = []
+        layersBefore = getLayers()
+        objectsBefore = set(getAllObjects())
+        try:
+            self.setupDocVariables()
+            for layer in self.layers():
+                setLayerVisible(layer, False)
+                hiddenLayers.append(layer)
+            setActiveLayer(self.layerCal)
+            self.cellsDone = 0
+            self.cellsTotal = self.countCells()
+            progressTotal(self.cellsTotal)
+            if self.cloneMonths:
+                self.createMonthsCloned(self.monthLayout())
             else:
-                 self.rowCnt = (nrVmthsCnt - 1) * 9
-            self.colCnt = self.nrHmthsCnt * (self.mthcols + 1)
-            cal = self.mycal.monthdatescalendar(self.year, i)
-            self.createMonthCalendar(i, cal, self.rowCnt, self.colCnt)
-            self.nrHmthsCnt += 1
-        if self.drawLegend:
-            self.createLegend()
-        setUnit(originalUnit)
+                for year, month, rowCnt, colCnt in self.monthLayout(): # loop for creating the months
+                    self.createMonthCalendar(year, month, rowCnt, colCnt)
+            if self.drawLegend:
+                self.createLegend()
+            if self.layerAstro in self.layers():
+                setActiveLayer(self.layerAstro)
+                self.createAstro()
+                setActiveLayer(self.layerCal)
+            if self.cardW > 0:
+                self.imposeCards(objectsBefore)
+        except CalendarCancelled:
+            self.removeCalendar(layersBefore, objectsBefore)
+            hiddenLayers = [x for x in hiddenLayers if x in layersBefore]
+            return 'Calendar cancelled'
+        finally:
+            for layer in hiddenLayers:
+                setLayerVisible(layer, True)
+            setRedraw(True)
+            setUnit(originalUnit)
         return None
 
+    def countCells(self):
+        """ Number of cells to draw, for the progress bar. A copy of the first
+            card counts as all cells of that card. """
+        cells = sum(len(self.monthCells(*x)) for x in self.monthLayout())
+        if self.drawLegend:
+            cells += 1
+        if self.layerAstro in self.layers():
+            cells += len(self.astroCells())
+        if self.cardW > 0:
+            cells *= len(self.cards)
+        return cells
+
+    def chunkDone(self, cells):
+        """ Count the cells of a drawn chunk (e.g. a week row), update the progress
+            bar and stop the drawing if the user cancelled. """
+        self.cellsDone += cells
+        progressSet(self.cellsDone)
+        if self.onProgress is not None and self.onProgress(self.cellsDone, self.cellsTotal):
+            raise CalendarCancelled()
+
+    def removeCalendar(self, layersBefore, objectsBefore):
+        """ Remove the partly drawn calendar: its frames and its new layers. """
+        for name in getAllObjects():
+            if name not in objectsBefore:
+                deleteObject(name)
+        if len(layersBefore) > 0:
+            setActiveLayer(layersBefore[0])
+        for layer in self.layers():
+            if layer not in layersBefore:
+                deleteLayer(layer)
+
+    def rowChunks(self, cells):
+        """ Cells split into rows: the chunks that are drawn between two cancel checks. """
+        chunks = []
+        for cell in cells:
+            if len(chunks) == 0 or cell.y != chunks[-1][0].y:
+                chunks.append([])
+            chunks[-1].append(cell)
+        return chunks
+
+    def layers(self):
+        """ Layers of the calendar: the moon and sun overlay has its own layer. """
+        if self.moonPhases or self.location is not None:
+            return [self.layerCal, self.layerAstro]
+        return [self.layerCal]
+
     def setupDocVariables(self):
         """ Compute base metrics here. Page layout is bordered by margins
             and empty image frame(s). """
@@ -223,34 +510,13 @@ class ScYearCalendar:
         self.pageX = page[0]
         self.pageY = page[1]
         marg = getPageMargins()
-        self.marginT = marg[0]
-        self.marginL = marg[1]
         self.marginR = marg[2]
         self.marginB = marg[3]
-        self.width = self.pageX - self.marginL - self.marginR
-        self.height = self.pageY - self.marginT - self.marginB
-        # month cell rows and cols
-        self.rows = 8 # month heading + weekday names +  6 weeks per month
-        self.rows = (self.rows * self.nrVmonths) + (self.nrVmonths - 1)
-            # add 1 row space between the month per column
-        if self.drawLegend:  # create text frame with holiday texts at the bottom
-            y = 0
-            for x in range(len(self.holidaysList)):
-                if len(self.holidaysList[x][3]) > 0:  # if there is a text
-                    y += 1
-            if y / self.nrHmonths == y // self.nrHmonths:
-                y = y // self.nrHmonths
-            else:
-                y = y // self.nrHmonths + 1
-            self.rows = self.rows + (y+2) * 0.6
-        self.rowSize = (self.height - self.offsetY) / self.rows
-        if self.weekNr:
-            self.mthcols = 8 # weekNr column + 7 weekdays per month
+        if self.cardW > 0: # the calendar is drawn on the first card
+            self.cards = self.cardSlots(*self.pageArea())
+            self.setupLayout(self.cards[0][0], self.cards[0][1], self.cardW, self.cardH)
         else:
-            self.mthcols = 7 # 7 weekdays columns per month
-        self.cols = (self.mthcols * self.nrHmonths) + (self.nrHmonths - 1)
-            # add 1 column space between the months per row
-        self.colSize = (self.width - self.offsetX) / self.cols
+            self.setupLayout(*self.pageArea())
         baseLine = self.rowSize
         h = (self.marginT + self.offsetY)
         x =  h/baseLine - h//baseLine
@@ -258,29 +524,8 @@ class ScYearCalendar:
         setBaseLine(baseLine, y) # for correct aligment of weekdays names
                                                       #  with ascender and descender characters
         # default calendar colors
-        defineColorCMYK("Black", 0, 0, 0, 255)
-        defineColorCMYK("White", 0, 0, 0, 0)
-        defineColorCMYK("fillMonthHeading", 0, 0, 0, 0) # default is White
-        defineColorCMYK("txtMonthHeading", 0, 0, 0, 255) # default is Black
-        defineColorCMYK("fillDayNames", 0, 0, 0, 200) # default is Dark Grey
-        defineColorCMYK("txtDayNames", 0, 0, 0, 0) # default is White
-        defineColorCMYK("fillWeekNo", 0, 0, 0, 200) # default is Dark Grey
-        defineColorCMYK("txtWeekNo", 0, 0, 0, 0) # default is White
-        defineColorCMYK("fillDate", 0, 0, 0, 0) # default is White
-        defineColorCMYK("txtDate", 0, 0, 0, 255) # default is Black
-        defineColorCMYK("fillWeekend", 0, 0, 0, 25) # default is Light Grey
-        defineColorCMYK("fillWeekend2", 0, 0, 0, 25) # default is Light Grey
-        defineColorCMYK("txtWeekend", 0, 0, 0, 200) # default is Dark Grey
-        defineColorCMYK("fillHoliday", 0, 0, 0, 25) # default is Light Grey
-        defineColorCMYK("txtHoliday", 0, 234, 246, 0) # default is Red
-        defineColorCMYK("fillSpecialDate", 0, 0, 0, 0) # default is White
-        defineColorCMYK("txtSpecialDate", 0, 0, 0, 128) # default is Middle Grey
-        defineColorCMYK("fillVacation", 0, 0, 0, 25) # default is Light Grey
-        defineColorCMYK("txtVacation", 0, 0, 0, 255) # default is Black
-        defineColorCMYK("gridColor", 0, 0, 0, 128) # default is Middle Grey
-        defineColorCMYK("gridMonthHeading", 0, 0, 0, 0) # default is White
-        defineColorCMYK("gridDayNames", 0, 0, 0, 128) # default is Middle Grey
-        defineColorCMYK("gridWeekNo", 0, 0, 0, 128) # default is Middle Grey
+        for color in calendarColors:
+            defineColorCMYK(*color)
         # styles
         scribus.createCharStyle(name=self.cStylMonthHeading, font=self.cFont,
             fontsize=(self.rowSize // 1.5), fillcolor="txtMonthHeading")
@@ -307,6 +552,20 @@ class ScYearCalendar:
         scribus.createParagraphStyle(name=self.pStyleLegend,  linespacingmode=0,
             linespacing=(self.rowSize *0.6), alignment=ALIGN_LEFT, 
             charstyle=self.cStylLegend)
+        if self.layerAstro in self.layers():
+            moonFont = self.cFont
+            if "Symbola Regular" in getFontNames(): # the moon glyphs of Symbola
+                moonFont = "Symbola Regular"
+            scribus.createCharStyle(name=self.cStylMoon, font=moonFont,
+                fontsize=(self.rowSize // 3), fillcolor="txtMoon")
+            scribus.createCharStyle(name=self.cStylSun, font=self.cFont,
+                fontsize=(self.rowSize // 3), fillcolor="txtSun")
+            scribus.createParagraphStyle(name=self.pStyleMoon, linespacingmode=2,
+                alignment=ALIGN_RIGHT, charstyle=self.cStylMoon)
+            scribus.createParagraphStyle(name=self.pStyleSunrise, linespacingmode=2,
+                alignment=ALIGN_LEFT, charstyle=self.cStylSun)
+            scribus.createParagraphStyle(name=self.pStyleSunset, linespacingmode=2,
+                alignment=ALIGN_RIGHT, charstyle=self.cStylSun)
         scribus.createCustomLineStyle(self.gridLineStyle, [
             {
                 'Color': "gridColor",
@@ -332,168 +591,543 @@ class ScYearCalendar:
             }
         ]);
         # layers
-        createLayer(self.layerCal)
+        for layer in self.layers():
+            createLayer(layer)
         if self.drawImg:
             self.createImg()
 
-    def createImg(self):
-        """ Create Image frame(s). """
+    def pageArea(self):
+        """ Left, top, width and height of the page area within the margins. """
+        page = getPageSize()
+        marg = getPageMargins()
+        return (marg[1], marg[0], page[0] - marg[1] - marg[2], page[1] - marg[0] - marg[3])
+
+    def cardSlots(self, left, top, width, height):
+        """ Top left corners of the cards (without bleed) that fit in the page
+            area, centered within the margins. """
+        pitchX = self.cardW + 2 * self.bleed + self.gutter
+        pitchY = self.cardH + 2 * self.bleed + self.gutter
+        nrX = int((width + self.gutter) // pitchX)
+        nrY = int((height + self.gutter) // pitchY)
+        x = left + (width - nrX * pitchX + self.gutter) / 2 + self.bleed
+        y = top + (height - nrY * pitchY + self.gutter) / 2 + self.bleed
+        return [(x + i * pitchX, y + j * pitchY) for j in range(nrY) for i in range(nrX)]
+
+    def cropMarkLines(self, cards):
+        """ Crop marks around the cards: start and end point of each line. """
+        lines = []
+        length = 12.0
+        distance = self.bleed + 3.0 # from the cutting line
+        top = min(y for x, y in cards)
+        bottom = max(y for x, y in cards) + self.cardH
+        left = min(x for x, y in cards)
+        right = max(x for x, y in cards) + self.cardW
+        for x in sorted(set([x for x, y in cards] + [x + self.cardW for x, y in cards])):
+            lines.append((x, top - distance - length, x, top - distance))
+            lines.append((x, bottom + distance, x, bottom + distance + length))
+        for y in sorted(set([y for x, y in cards] + [y + self.cardH for x, y in cards])):
+            lines.append((left - distance - length, y, left - distance, y))
+            lines.append((right + distance, y, right + distance + length, y))
+        return lines
+
+    def setupLayout(self, left, top, width, height):
+        """ Compute the cell grid within the area bordered by the page margins.
+            Needs no Scribus document, so it is shared with the preview. """
+        self.marginL = left
+        self.marginT = top
+        self.width = width
+        self.height = height
+        # month cell rows and cols
+        self.rows = 8 # month heading + weekday names +  6 weeks per month
+        self.rows = (self.rows * self.nrVmonths) + (self.nrVmonths - 1)
+            # add 1 row space between the month per column
+        if self.drawLegend:  # create text frame with holiday texts at the bottom
+            y = 0
+            for x in range(len(self.holidaysList)):
+                if len(self.holidaysList[x][3]) > 0:  # if there is a text
+                    y += 1
+            if y / self.nrHmonths == y // self.nrHmonths:
+                y = y // self.nrHmonths
+            else:
+                y = y // self.nrHmonths + 1
+            self.rows = self.rows + (y+2) * 0.6
+        self.rowSize = (self.height - self.offsetY) / self.rows
+        if self.weekNr:
+            self.mthcols = 8 # weekNr column + 7 weekdays per month
+        else:
+            self.mthcols = 7 # 7 weekdays columns per month
+        self.cols = (self.mthcols * self.nrHmonths) + (self.nrHmonths - 1)
+            # add 1 column space between the months per row
+        self.colSize = (self.width - self.offsetX) / self.cols
+
+    def monthLayout(self):
+        """ Year, month, first row and first column of each month calendar. """
+        layout = []
+        for run in range(len(self.months)):
+            year = self.year
+            if self.months[0] + run > 12: # start month is not 1
+                year = self.year + 1
+            layout.append((year, self.months[run], (run // self.nrHmonths) * 9,
+                (run % self.nrHmonths) * (self.mthcols + 1)))
+        return layout
+
+    def imgBoxes(self):
+        """ Position and size of the empty image frame(s). """
+        boxes = []
         if self.offsetX != 0:
-            createImage(self.marginL, self.marginT, self.offsetX - self.marginX, self.height)
+            boxes.append((self.marginL, self.marginT, self.offsetX - self.marginX, self.height))
         if self.offsetY != 0: # if top AND left frame -> top frame does not overlap with left frame
-            createImage(self.marginL + self.offsetX, self.marginT,
-                self.width-self.offsetX, self.offsetY - self.marginY)
+            boxes.append((self.marginL + self.offsetX, self.marginT,
+                self.width-self.offsetX, self.offsetY - self.marginY))
+        return boxes
 
-    def createLegend(self):
-        """ Create text frame at the bottom of the page. """
-        self.rowCnt += 2
+    def legendBox(self):
+        """ Position, size, number of columns and column gap of the holiday texts frame. """
+        year, month, rowCnt, colCnt = self.monthLayout()[-1]
+        rowCnt += 2 + len(self.mycal.monthdatescalendar(year, month)) # below the last month
+        rowCnt += 2
+        offsetX = self.offsetX
         x = 1
         if self.weekNr and self.months[0]==1:  # indent legend texts if no year printed
-             self.offsetX = self.offsetX + (self.colSize)
+             offsetX = offsetX + (self.colSize)
              x = 2
-        cel = createText(self.marginL + self.offsetX,
-                                 self.marginT + self.offsetY + self.rowCnt * self.rowSize, 
-                                 self.width - self.offsetX, 
-                                 self.height -self.offsetY - self.rowCnt * self.rowSize)
-        setColumns(self.nrHmonths, cel)
-        setColumnGap(self.colSize * x, cel)
-        deselectAll()
-        selectObject(cel)
+        return (self.marginL + offsetX, self.marginT + self.offsetY + rowCnt * self.rowSize,
+            self.width - offsetX, self.height -self.offsetY - rowCnt * self.rowSize,
+            self.nrHmonths, self.colSize * x)
+
+    def legendTexts(self):
+        """ Lines of the holiday texts frame. """
+        texts = []
         for x in range(len(self.holidaysList)):
             if len(self.holidaysList[x][3]) > 0:  # if there is a text
-                txtHoliday = (("0" if len(self.holidaysList[x][2]) == 1 else "") + self.holidaysList[x][2]
+                texts.append(("0" if len(self.holidaysList[x][2]) == 1 else "") + self.holidaysList[x][2]
                 + "/" + ("0" if len(self.holidaysList[x][1]) == 1 else "") + self.holidaysList[x][1]
                 + (("/" + str(self.holidaysList[x][0])) if self.months[0] != 1 else "")
                 + " " + self.holidaysList[x][3] + "\n")
-                insertText(txtHoliday, -1, cel)
-            setParagraphStyle(self.pStyleLegend, cel)
-    def createMonthCalendar(self, month, cal, rowCnt, colCnt):
-        """ Draw one month calendar """
-        self.rowCnt = rowCnt
-        self.colCnt = colCnt
-        self.createMonthHeader(calendar.month_name[month], self.rowCnt, self.colCnt)
-        for week in cal:
+        return texts
+
+    def monthCells(self, year, month, rowCnt, colCnt):
+        """ Cells of one month calendar: header, weekday names and weeks. """
+        cells = []
+        left = self.marginL + self.offsetX + colCnt * self.colSize
+        top = self.marginT + self.offsetY + rowCnt * self.rowSize
+        cells.append(Cell(left, top, self.colSize * self.mthcols, self.rowSize,
+            calendar.month_name[month].upper() + " " + str(year), self.pStyleMonthHeading,
+            self.gridLineStyleMonthHeading, "fillMonthHeading", None))
+        top += self.rowSize
+        x = left
+        if self.weekNr:
+            cells.append(Cell(x, top, self.colSize, self.rowSize, self.weekNrHd,
+                self.pStyleWeekNo, self.gridLineStyleWeekNo, "fillWeekNo", None))
+            x += self.colSize
+        for j in self.dayOrder: # day names
+            cells.append(Cell(x, top, self.colSize, self.rowSize, j,
+                self.pStyleDayNames, self.gridLineStyleDayNames, "fillDayNames", None))
+            x += self.colSize
+        for week in self.mycal.monthdatescalendar(year, month):
+            top += self.rowSize
+            x = left
             if self.weekNr:
-                cel = createText(self.marginL + self.offsetX + self.colCnt * self.colSize,
-                                 self.marginT + self.offsetY + self.rowCnt * self.rowSize, 
-                                 self.colSize, self.rowSize)
-                yr, mt, dt = str((week[0])).split("-")
-                setText(str(datetime.date(int(yr), int(mt), int(dt)).isocalendar()[1]), cel)
-                setFillColor("fillWeekNo", cel)
-                setCustomLineStyle(self.gridLineStyleWeekNo, cel)
-                deselectAll()
-                selectObject(cel)
-                setParagraphStyle(self.pStyleWeekNo, cel)
-                setTextVerticalAlignment(ALIGNV_TOP,cel)
-                self.colCnt += 1
-            for day in week:
-                cel = createText(self.marginL + self.offsetX + self.colCnt * self.colSize,
-                    self.marginT + self.offsetY + self.rowSize * self.rowCnt,
-                    self.colSize, self.rowSize)
-                setFillColor("fillDate", cel)
-                setCustomLineStyle(self.gridLineStyle, cel)
+                cells.append(Cell(x, top, self.colSize, self.rowSize,
+                    str(week[0].isocalendar()[1]), self.pStyleWeekNo,
+                    self.gridLineStyleWeekNo, "fillWeekNo", None))
+                x += self.colSize
+            for pos in range(7):
+                day = week[pos]
                 if day.month == month:
-                    setText(str(day.day), cel)
-                    deselectAll()
-                    selectObject(cel)
-                    setParagraphStyle(self.pStyleDate, cel)
-                    setTextVerticalAlignment(ALIGNV_TOP,cel)
-                    if calendar.firstweekday() == 6: # weekend day
-                        x = 1
-                    else:
-                        x = 6
-                    y = 8 - self.mthcols
-                    if (int(self.colCnt - self.nrHmthsCnt * (self.mthcols + 1) + y) == x or 
-                        int(self.colCnt - self.nrHmthsCnt * (self.mthcols + 1) + y) == 7):
-                            setTextColor("txtWeekend", cel)
-                            setFillColor("fillWeekend", cel)
-                    for x in range(len(self.holidaysList)): # holiday
-                        if (self.holidaysList[x][0] == (day.year) and
-                                self.holidaysList[x][1] == str(day.month) and
-                                self.holidaysList[x][2] == str(day.day)):
-                            if self.holidaysList[x][4] == "":
-                                if getFillColor(cel) != "fillWeekend":
-                                    setTextColor("txtVacation", cel)
-                                    setFillColor("fillVacation", cel)
-                            elif self.holidaysList[x][4] == '0':
-                                setTextColor("txtSpecialDate", cel)
-                                if getFillColor(cel) == "fillWeekend":
-                                    setFillColor("fillWeekend", cel)
-                                elif getFillColor(cel) == "fillVacation":
-                                    setFillColor("fillVacation", cel)
-                                else:
-                                    setFillColor("fillSpecialDate", cel)
-                            else:
-                                setParagraphStyle(self.pStyleHolidays, cel)
-                                setTextColor("txtHoliday", cel)
-                                setFillColor("fillHoliday", cel)
+                    pStyle, fill, txtColor = self.dateColors(day, pos)
+                    cells.append(Cell(x, top, self.colSize, self.rowSize, str(day.day),
+                        pStyle, self.gridLineStyle, fill, txtColor))
                 else:  # fill previous or next month weekend cells
-                    if calendar.firstweekday() == 6: # weekend day
-                        x = 1
-                    else:
-                        x = 6
-                    y = 8 - self.mthcols
-                    if (int(self.colCnt - self.nrHmthsCnt * (self.mthcols + 1) + y) == x or 
-                        int(self.colCnt - self.nrHmthsCnt * (self.mthcols + 1) + y) == 7):
-                            setFillColor("fillWeekend2", cel)
-                self.colCnt += 1
-            self.colCnt = self.colCnt - self.mthcols
-            self.rowCnt += 1
-        return
-
-    def createMonthHeader(self, monthName, rowCnt, colCnt):
-        """ Draw month calendars header """
-        self.rowCnt = rowCnt
-        self.colCnt = colCnt
-        cel = createText(self.marginL + self.offsetX + self.colCnt * self.colSize,
-                self.marginT + self.offsetY + self.rowCnt * self.rowSize,
-                self.colSize * self.mthcols, self.rowSize)
-        mtHd = monthName
-        setText(mtHd.upper() + " " + str(self.year), cel)
-        setFillColor("fillMonthHeading", cel)
-        setCustomLineStyle(self.gridLineStyleMonthHeading, cel)
+                    cells.append(Cell(x, top, self.colSize, self.rowSize, "",
+                        None, self.gridLineStyle, self.dayColumns[pos][2], None))
+                x += self.colSize
+        return cells
+
+    def astroCells(self):
+        """ Cells of the moon and sun overlay: the glyph of a principal moon phase
+            in the top right corner of its date and the sunrise and sunset of the
+            first day of the month at the left and right of the month heading. """
+        cells = []
+        for year, month, rowCnt, colCnt in self.monthLayout():
+            moon, sun = astroTables(year, self.location)
+            left = self.marginL + self.offsetX + colCnt * self.colSize
+            top = self.marginT + self.offsetY + rowCnt * self.rowSize
+            if self.location is not None:
+                times = ["--:--" if x is None else "%02d:%02d" % divmod(x, 60)
+                    for x in sun[date(year, month, 1)]]
+                cells.append(Cell(left, top, self.colSize * self.mthcols, self.rowSize,
+                    "\u2191" + times[0], self.pStyleSunrise, None, None, None))
+                cells.append(Cell(left, top, self.colSize * self.mthcols, self.rowSize,
+                    "\u2193" + times[1], self.pStyleSunset, None, None, None))
+            if not self.moonPhases:
+                continue
+            top += self.rowSize # weekday names
+            for week in self.mycal.monthdatescalendar(year, month):
+                top += self.rowSize
+                x = left + self.colSize / 2
+                if self.weekNr:
+                    x += self.colSize
+                for day in week:
+                    if day.month == month and day in moon:
+                        cells.append(Cell(x, top, self.colSize / 2, self.rowSize,
+                            moonGlyphs[moon[day]], self.pStyleMoon, None, None, None))
+                    x += self.colSize
+        return cells
+
+    def dateColors(self, day, pos):
+        """ Paragraph style, fill and text color of a date: weekend, holiday,
+            special date or vacation. """
+        pStyle = self.pStyleDate
+        fill, txtColor = self.dayColumns[pos][:2] # weekend or not
+        for holiday in self.holidayIndex.get((day.year, str(day.month), str(day.day)), ()):
+            if holiday[4] == "":
+                if fill != "fillWeekend":
+                    txtColor = "txtVacation"
+                    fill = "fillVacation"
+            elif holiday[4] == '0':
+                txtColor = "txtSpecialDate"
+                if fill != "fillWeekend" and fill != "fillVacation":
+                    fill = "fillSpecialDate"
+            else:
+                pStyle = self.pStyleHolidays
+                txtColor = "txtHoliday"
+                fill = "fillHoliday"
+        return pStyle, fill, txtColor
+
+    def createImg(self):
+        """ Create Image frame(s). """
+        for box in self.imgBoxes():
+            createImage(*box)
+
+    def createLegend(self):
+        """ Create text frame at the bottom of the page. """
+        x, y, w, h, columns, gap = self.legendBox()
+        cel = createText(x, y, w, h)
+        setColumns(columns, cel)
+        setColumnGap(gap, cel)
         deselectAll()
         selectObject(cel)
-        setParagraphStyle(self.pStyleMonthHeading, cel)
-        setTextVerticalAlignment(ALIGNV_TOP, cel)
-        self.rowCnt += 1
-        if self.weekNr:
-            cel = createText(self.marginL + self.offsetX+ self.colCnt * self.colSize,
-                self.marginT + self.offsetY + self.rowSize * self.rowCnt, self.colSize,
-                self.rowSize)
-            try:
-                setText(self.weekNrHd, cel)
-            except:
-                pass
-            setFillColor("fillWeekNo", cel)
-            setCustomLineStyle(self.gridLineStyleWeekNo, cel)
+        for txtHoliday in self.legendTexts():
+            insertText(txtHoliday, -1, cel)
+        setParagraphStyle(self.pStyleLegend, cel)
+        self.chunkDone(1)
+
+    def createAstro(self):
+        """ Create the frames of the moon and sun overlay on the active layer. """
+        for chunk in self.rowChunks(self.astroCells()):
+            for cell in chunk:
+                cel = createText(cell.x, cell.y, cell.w, cell.h)
+                setText(cell.text, cel)
+                deselectAll()
+                selectObject(cel)
+                setParagraphStyle(cell.pStyle, cel)
+                setTextVerticalAlignment(ALIGNV_TOP, cel)
+                self.astroNames.append(cel)
+            self.chunkDone(len(chunk))
+
+    def imposeCards(self, objectsBefore):
+        """ Group the calendar of the first card and place a copy of the group
+            on every other card, the moon and sun overlay on its own layer. Objects
+            of 'objectsBefore' (on the page before this calendar) are left alone. """
+        skip = objectsBefore | set(self.astroNames)
+        cardCells = self.cellsTotal // len(self.cards) # cells of one card, see countCells()
+        for layer, names, cells in ((self.layerCal, [x for x in getAllObjects() if x not in skip],
+                cardCells - len(self.astroNames)), (self.layerAstro, self.astroNames,
+                len(self.astroNames))):
+            if len(names) == 0:
+                continue
+            setActiveLayer(layer)
+            group = groupObjects(names)
+            x0, y0 = self.cards[0]
+            for x, y in self.cards[1:]:
+                copy = duplicateObject(group)
+                moveObject(x - x0, y - y0, copy)
+                self.chunkDone(cells)
+        setActiveLayer(self.layerCal)
+        if self.cropMarks:
+            for line in self.cropMarkLines(self.cards):
+                cel = createLine(*line)
+                setLineWidth(0.25, cel)
+                setLineColor("Black", cel)
+
+    def createMonthCalendar(self, year, month, rowCnt, colCnt):
+        """ Draw one month calendar, a row at a time """
+        for chunk in self.rowChunks(self.monthCells(year, month, rowCnt, colCnt)):
+            for cell in chunk:
+                self.createCell(cell)
+            self.chunkDone(len(chunk))
+
+    def createCell(self, cell):
+        """ Draw one cell of a month calendar """
+        cel = createText(cell.x, cell.y, cell.w, cell.h)
+        if cell.text:
+            setText(cell.text, cel)
+        setFillColor(cell.fill, cel)
+        setCustomLineStyle(cell.lineStyle, cel)
+        if cell.pStyle:
             deselectAll()
             selectObject(cel)
-            setParagraphStyle(self.pStyleWeekNo, cel)
+            setParagraphStyle(cell.pStyle, cel)
             setTextVerticalAlignment(ALIGNV_TOP, cel)
-            self.colCnt += 1
-        for j in self.dayOrder: # day names
-            cel = createText(self.marginL + self.offsetX + self.colCnt * self.colSize,
-                self.marginT + self.offsetY + self.rowSize * self.rowCnt,
-                self.colSize, self.rowSize)
-            setText(j, cel)
-            setFillColor("fillDayNames", cel)
-            setCustomLineStyle(self.gridLineStyleDayNames, cel)
+        if cell.txtColor:
+            setTextColor(cell.txtColor, cel)
+        return cel
+
+    def skeletonCells(self, year, month, rowCnt, colCnt):
+        """ Cells of a month skeleton: header, weekday names and 6 weeks
+            of styled date cells with a placeholder text. """
+        cells = self.monthCells(year, month, rowCnt, colCnt)
+        skeleton = cells[:self.mthcols + 1] # header, week numbers heading and day names
+        for i in range(6):
+            pos = 6 - self.mthcols # weekday column, the week number column is -1
+            for cell in cells[self.mthcols + 1:2 * self.mthcols + 1]: # first week
+                pos += 1
+                if pos >= 0: # same weekend colors for all months
+                    fill, txtColor = self.dayColumns[pos][:2]
+                    cell = cell._replace(text="00", pStyle=self.pStyleDate, fill=fill,
+                        txtColor=txtColor)
+                skeleton.append(cell._replace(y=cell.y + i * self.rowSize))
+        return skeleton
+
+    def createMonthsCloned(self, layout):
+        """ Draw one styled month skeleton, group it and duplicate and move the
+            group for the other months. The frames of each copy only get their
+            texts and the colors of holidays and previous or next month dates. """
+        year, month, rowCnt, colCnt = layout[0]
+        skeleton = self.skeletonCells(year, month, rowCnt, colCnt)
+        names = [self.createCell(cell) for cell in skeleton]
+        group = groupObjects(names)
+        copies = []
+        for year, month, rowCnt, colCnt in layout[1:]:
+            dx = (colCnt - layout[0][3]) * self.colSize
+            dy = (rowCnt - layout[0][2]) * self.rowSize
+            before = set(getAllObjects())
+            copy = duplicateObject(group)
+            moveObject(dx, dy, copy)
+            unGroupObjects(copy)
+            frames = {}
+            for name in getAllObjects():
+                if name not in before:
+                    x, y = getPosition(name)
+                    frames[(round(x - dx, 1), round(y - dy, 1))] = name
+            copies.append(([frames[(round(cell.x, 1), round(cell.y, 1))] for cell in skeleton],
+                year, month, rowCnt, colCnt))
+            self.chunkDone(0) # cells are counted when they are filled
+        unGroupObjects(group)
+        copies.insert(0, (names,) + layout[0])
+        for names, year, month, rowCnt, colCnt in copies:
+            cells = self.monthCells(year, month, rowCnt, colCnt)
+            pos = 0
+            for chunk in self.rowChunks(cells):
+                for cell, skel, cel in zip(chunk, skeleton[pos:], names[pos:]):
+                    self.fillCell(cel, cell, skel)
+                pos += len(chunk)
+                self.chunkDone(len(chunk))
+            for cel in names[len(cells):]: # month with less than 6 weeks
+                deleteObject(cel)
+
+    def fillCell(self, cel, cell, skel):
+        """ Change a frame of a month skeleton 'skel' into 'cell'. """
+        if cell.text != skel.text:
+            length = getTextLength(cel)
+            if cell.text:
+                insertText(cell.text, 0, cel) # keeps the style of the placeholder
+            selectText(len(cell.text), length, cel)
+            deleteText(cel)
+        if cell.fill != skel.fill:
+            setFillColor(cell.fill, cel)
+        if cell.pStyle and cell.pStyle != skel.pStyle:
             deselectAll()
             selectObject(cel)
-            setParagraphStyle(self.pStyleDayNames, cel)
-            setTextVerticalAlignment(ALIGNV_TOP, cel)
-            self.colCnt+= 1
-        self.rowCnt += 1
-        self.colCnt = self.colCnt - self.mthcols
+            setParagraphStyle(cell.pStyle, cel)
+        if cell.txtColor and cell.txtColor != skel.txtColor:
+            setTextColor(cell.txtColor, cel)
+
+######################################################
+class SvgYearCalendar(ScYearCalendar):
+    """ Calendar writer without Scribus: SVG and, if the reportlab package is
+        installed, PDF with the layout, styles and colors of ScYearCalendar.
+        Meant for proofs, web previews and mass generation. """
+
+    def __init__(self, year, pageSize=(595.28, 841.89), pageMargins=(40.0, 40.0, 40.0, 40.0),
+                **options):
+        """ Page size (pt) and page margins (top, left, right, bottom as
+            getPageMargins) replace the Scribus document. """
+        ScYearCalendar.__init__(self, year, pageSize=pageSize, pageMargins=pageMargins, **options)
+        self.pageX = pageSize[0]
+        self.pageY = pageSize[1]
+
+    def pageArea(self):
+        """ Left, top, width and height of the page area within the margins. """
+        marg = self.pageMargins
+        return (marg[1], marg[0], self.pageX - marg[1] - marg[2], self.pageY - marg[0] - marg[3])
+
+    def createCalendar(self, svgFile=None, pdfFile=None):
+        """ Write the calendar to an SVG and / or PDF file. """
+        if self.cardW > 0 and len(self.cardSlots(*self.pageArea())) == 0:
+            return 'The card does not fit within the page margins'
+        self.setupDocVariables()
+        if svgFile:
+            with open(svgFile, mode="wt", encoding="utf8") as f:
+                f.write(self.svgText())
+        if pdfFile:
+            return self.writePdf(pdfFile)
+        return None
+
+    def setupDocVariables(self):
+        """ Compute base metrics and the font sizes of the styles. """
+        self.cards = [(0.0, 0.0)]
+        if self.cardW > 0: # the calendar is drawn on the first card
+            self.cards = self.cardSlots(*self.pageArea())
+            self.setupLayout(self.cards[0][0], self.cards[0][1], self.cardW, self.cardH)
+        else:
+            self.setupLayout(*self.pageArea())
+        # as the char styles of ScYearCalendar
+        self.fontSizes = dict((pStyle, self.rowSize // 2) for pStyle in self.styleTxtColors)
+        self.fontSizes[self.pStyleMonthHeading] = self.rowSize // 1.5
+        for pStyle in (self.pStyleMoon, self.pStyleSunrise, self.pStyleSunset):
+            self.fontSizes[pStyle] = self.rowSize // 3
+        self.fontFamily = self.cFont.replace(" Regular", "")
+
+    def drawingItems(self):
+        """ Rectangles ('rect', x, y, w, h, fill, line color), texts ('text', x,
+            baseline, text, font size, color, anchor) and moon phases ('moon', x,
+            baseline, phase, font size, color) of the first card or page. """
+        items = []
+        for year, month, rowCnt, colCnt in self.monthLayout():
+            for cell in self.monthCells(year, month, rowCnt, colCnt):
+                items.append(('rect', cell.x, cell.y, cell.w, cell.h, cell.fill,
+                    self.lineStyleColors[cell.lineStyle]))
+                if cell.text: # text on the baseline grid of the rows
+                    items.append(('text', cell.x + cell.w / 2, cell.y + self.rowSize * 0.75,
+                        cell.text, self.fontSizes[cell.pStyle],
+                        cell.txtColor or self.styleTxtColors[cell.pStyle], 'middle'))
+        if self.drawLegend:
+            x, y, w, h, columns, gap = self.legendBox()
+            lineSpacing = self.rowSize * 0.6
+            linesPerColumn = max(1, int(h // lineSpacing))
+            colWidth = (w - (columns - 1) * gap) / columns
+            for i, line in enumerate(self.legendTexts()):
+                column = i // linesPerColumn
+                if column >= columns:
+                    break # text overflow, as in Scribus
+                items.append(('text', x + column * (colWidth + gap),
+                    y + (i % linesPerColumn) * lineSpacing + lineSpacing * 0.8, line.strip(),
+                    self.fontSizes[self.pStyleLegend], self.styleTxtColors[self.pStyleLegend], 'start'))
+        for cell in self.astroCells(): # as the top aligned frames in Scribus
+            size = self.fontSizes[cell.pStyle]
+            if cell.pStyle == self.pStyleMoon:
+                items.append(('moon', cell.x + cell.w - size / 2, cell.y + size,
+                    moonGlyphs.index(cell.text), size, self.styleTxtColors[cell.pStyle]))
+            elif cell.pStyle == self.pStyleSunrise:
+                items.append(('text', cell.x, cell.y + size, cell.text, size,
+                    self.styleTxtColors[cell.pStyle], 'start'))
+            else:
+                items.append(('text', cell.x + cell.w, cell.y + size, cell.text, size,
+                    self.styleTxtColors[cell.pStyle], 'end'))
+        return items
+
+    def svgText(self):
+        """ The calendar as SVG. The other cards use the drawing of the first card. """
+        from html import escape # lighter than xml.sax.saxutils
+        svg = ['<?xml version="1.0" encoding="UTF-8"?>',
+            '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            'width="%.2fpt" height="%.2fpt" viewBox="0 0 %.2f %.2f">' % (self.pageX, self.pageY,
+            self.pageX, self.pageY),
+            '<g id="calendar" font-family="%s, sans-serif" stroke-width="0.25">' % escape(self.fontFamily)]
+        for item in self.drawingItems():
+            if item[0] == 'rect':
+                svg.append('<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" fill="%s" stroke="%s"/>'
+                    % (item[1], item[2], item[3], item[4], colorHex(item[5]), colorHex(item[6])))
+            elif item[0] == 'moon':
+                svg.append('<text x="%.2f" y="%.2f" font-size="%.1f" fill="%s" '
+                    'font-family="Symbola" text-anchor="middle">%s</text>' % (item[1], item[2],
+                    item[4], colorHex(item[5]), moonGlyphs[item[3]]))
+            else:
+                svg.append('<text x="%.2f" y="%.2f" font-size="%.1f" fill="%s"%s>%s</text>'
+                    % (item[1], item[2], item[4], colorHex(item[5]),
+                    '' if item[6] == 'start' else ' text-anchor="%s"' % item[6], escape(item[3])))
+        svg.append('</g>')
+        x0, y0 = self.cards[0]
+        for x, y in self.cards[1:]:
+            svg.append('<use xlink:href="#calendar" transform="translate(%.2f %.2f)"/>' % (x - x0, y - y0))
+        if self.cardW > 0 and self.cropMarks:
+            for line in self.cropMarkLines(self.cards):
+                svg.append('<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f" stroke="black" '
+                    'stroke-width="0.25"/>' % line)
+        svg.append('</svg>\n')
+        return "\n".join(svg)
+
+    def writePdf(self, pdfFile):
+        """ Write the calendar as PDF with CMYK colors. The first card is a form
+            that is placed on the other cards. """
+        try:
+            from reportlab.pdfgen import canvas as pdfCanvas
+        except ImportError:
+            return 'PDF output needs the reportlab package'
+        colors = dict((color[0], [c / 255.0 for c in color[1:]]) for color in calendarColors)
+        pdf = pdfCanvas.Canvas(pdfFile, pagesize=(self.pageX, self.pageY))
+        pdf.beginForm("calendar")
+        pdf.setLineWidth(0.25)
+        for item in self.drawingItems():
+            if item[0] == 'rect':
+                pdf.setFillColorCMYK(*colors[item[5]])
+                pdf.setStrokeColorCMYK(*colors[item[6]])
+                pdf.rect(item[1], self.pageY - item[2] - item[4], item[3], item[4], fill=1, stroke=1)
+            elif item[0] == 'moon': # drawn, the standard PDF fonts have no moon glyphs
+                r = item[4] * 0.4
+                x = item[1]
+                y = self.pageY - item[2] + r
+                pdf.setFillColorCMYK(*colors[item[5]])
+                pdf.setStrokeColorCMYK(*colors[item[5]])
+                pdf.circle(x, y, r, stroke=1, fill=int(item[3] == 0))
+                if item[3] % 2 == 1: # dark half: left at first quarter, right at last quarter
+                    pdf.wedge(x - r, y - r, x + r, y + r, 90 if item[3] == 1 else -90, 180,
+                        stroke=0, fill=1)
+                pdf.setStrokeColorCMYK(*colors["Black"])
+            else:
+                pdf.setFillColorCMYK(*colors[item[5]])
+                pdf.setFont("Helvetica", item[4])
+                if item[6] == 'middle':
+                    pdf.drawCentredString(item[1], self.pageY - item[2], item[3])
+                elif item[6] == 'end':
+                    pdf.drawRightString(item[1], self.pageY - item[2], item[3])
+                else:
+                    pdf.drawString(item[1], self.pageY - item[2], item[3])
+        pdf.endForm()
+        x0, y0 = self.cards[0]
+        for x, y in self.cards:
+            pdf.saveState()
+            pdf.translate(x - x0, y0 - y)
+            pdf.doForm("calendar")
+            pdf.restoreState()
+        if self.cardW > 0 and self.cropMarks:
+            pdf.setLineWidth(0.25)
+            pdf.setStrokeColorCMYK(*colors["Black"])
+            for x1, y1, x2, y2 in self.cropMarkLines(self.cards):
+                pdf.line(x1, self.pageY - y1, x2, self.pageY - y2)
+        pdf.showPage()
+        pdf.save()
+        return None
 
 ######################################################
 class calcHolidays:
-    """ Import local holidays from '*holidays.txt'-file and convert the variable
-    holidays into dates for the given year."""
+    """ Import local holidays from '*holidays.txt'-files and convert the variable
+    holidays into dates for the given year. Parsed files and their dates are
+    cached on disk per file version and year."""
 
-    def __init__(self, year):
+    def __init__(self, year, quiet=False):
         self.year = year
+        self.quiet = quiet # collect the warnings instead of showing them, e.g. in a thread
+        self.warnings = list()
+
+    def warn(self, message):
+        """ Show a warning, or only collect it if quiet."""
+        self.warnings.append(message)
+        if not self.quiet:
+            print(message)
+            messageBox("Warning:", message, ICON_CRITICAL)
 
     def calcEaster(self):
         """ Calculate Easter date for the calendar Year using Butcher's Algorithm. 
@@ -545,60 +1179,544 @@ class calcHolidays:
             raise IndexError("No {}th day of month {}".format(n, month))
         return (year, month, day)
 
-    def importHolidays(self):
-        """ Import local holidays from '*holidays.txt'-file."""
-        holidaysFile = filedialog.askopenfilename(title="Open the \
-'holidays.txt'-file or cancel")
-        holidaysList=list()
+    def importHolidays(self, holidaysFiles=None):
+        """ Import local holidays from one or more '*holidays.txt'-files. A date of
+        a later file replaces the same kind of date (holiday, special date or vacation)
+        of the files before it, e.g. national, regional and company holidays."""
+        if holidaysFiles is None:
+            holidaysFiles = filedialog.askopenfilenames(title="Open the \
+'holidays.txt'-file(s) or cancel")
+        holidaysLists = list()
+        for holidaysFile in holidaysFiles:
+            holidaysList = self.holidaysFromFile(holidaysFile)
+            if holidaysList is None:
+                self.warn("'%s' can not be read (missing or not UTF-8) and is skipped." % holidaysFile)
+            else:
+                holidaysLists.append(holidaysList)
+        if len(holidaysLists) == 0:
+            self.warn("Holidays wil NOT be shown.")
+            return list() # returns an empty holidays list
+        return self.mergeHolidays(holidaysLists)
+
+    def holidaysFromFile(self, holidaysFile):
+        """ Holidays of one file for the calendar year and the next year, or None
+        if the file can not be read. Taken from the cache if the file did not change."""
+        try:
+            status = stat(holidaysFile)
+        except (OSError, ValueError):
+            return None
+        import hashlib
+        import json
+        key = "%s|%d|%d" % (abspath(holidaysFile), status.st_mtime_ns, status.st_size)
+        ics = holidaysFile.lower().endswith(".ics")
+        if ics: # the kinds of the events depend on the icsCategories list
+            key += "|" + json.dumps(icsCategories)
+        cacheFile = join(holidaysCacheDir, hashlib.sha1(key.encode("utf8")).hexdigest() + ".json")
+        try:
+            with open(cacheFile, mode="rt", encoding="utf8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            rules = None # iCalendar files are not parsed in advance, see resolveIcsFile
+            if not ics:
+                rules = self.readHolidaysFile(holidaysFile)
+                if rules is None:
+                    return None
+            cached = {"key": key, "rules": rules, "years": {}}
+        years = [year for year in (self.year, self.year + 1) if str(year) not in cached["years"]]
+        changed = len(years) > 0
+        if ics and changed:
+            resolved = self.resolveIcsFile(holidaysFile, years[0], years[-1])
+            if resolved is None:
+                return None
+            cached["years"].update(resolved)
+        holidaysList = list()
+        valid = True
+        for year in (self.year, self.year + 1):
+            if str(year) not in cached["years"]:
+                cached["years"][str(year)] = calcHolidays(year).resolveHolidays(cached["rules"])
+            holidays, yearValid = cached["years"][str(year)]
+            holidaysList.extend(tuple(h) for h in holidays)
+            valid = valid and yearValid
+        if not valid:
+            self.warn("Not a valid Holidays file.\nHolidays wil NOT be shown.")
+        if changed:
+            self.writeCache(cacheFile, cached)
+        return holidaysList
+
+    def readHolidaysFile(self, holidaysFile):
+        """ Read the rows of a '*holidays.txt'-file, or None if it can not be opened."""
+        import csv
         try:
             csvfile = open(holidaysFile, mode="rt",  encoding="utf8")
-        except:
-            print("Holidays wil NOT be shown.")
-            messageBox("Warning:",
-               "Holidays wil NOT be shown.",
-               ICON_CRITICAL)
-            return holidaysList # returns an empty holidays list
-        csvReader = csv.reader(csvfile, delimiter=",")
-        for row in csvReader:
+        except (OSError, ValueError):
+            return None
+        with csvfile:
+            try:
+                return [row for row in csv.reader(csvfile, delimiter=",")]
+            except UnicodeDecodeError:
+                return None
+
+    def writeCache(self, cacheFile, cached):
+        """ Store a parsed holidays file. The file is replaced at once, so parallel
+        runs never read half a file. A cache that can not be written is skipped."""
+        import json
+        import tempfile
+        try:
+            makedirs(holidaysCacheDir, exist_ok=True)
+            fd, tmpFile = tempfile.mkstemp(dir=holidaysCacheDir, suffix=".tmp")
+            with open(fd, mode="wt", encoding="utf8") as f:
+                json.dump(cached, f)
+            replace(tmpFile, cacheFile)
+        except OSError:
+            pass
+
+    def resolveHolidays(self, rules):
+        """ Convert the rows of a holidays file into dates of the calendar year.
+        Returns the holidays and False if the file has an invalid row (the rows
+        after it are skipped)."""
+        holidaysList=list()
+        for row in rules:
             try:
                 if row[0] == "fixed":
                     holidaysList.append((self.year, row[1], row[2], row[4], row[5]))
-                    holidaysList.append((self.year + 1, row[1], row[2], row[4], row[5]))
                 elif row[0] == "nWDOM": # nth WeekDay Of Month
                     dt=self.calcNthWeekdayOfMonth(int(row[3]), int(row[2]), int(row[1]), int(self.year))
                     holidaysList.append((self.year, str(dt[1]), str(dt[2]), row[4], row[5]))
-                    dt=self.calcNthWeekdayOfMonth(int(row[3]), int(row[2]), int(row[1]), int(self.year + 1))
-                    holidaysList.append((self.year + 1, str(dt[1]), str(dt[2]), row[4], row[5]))
                 elif row[0] == "variable":
                     if row[1] == "easter" :
                         base=self.calcEaster()
                         dt=self.calcVarHoliday(base, int(row[2]))
                         holidaysList.append(((dt.year), str(dt.month), str(dt.day), row[4], row[5]))
-                        self.year =self. year + 1
-                        base=self.calcEaster()
-                        dt=self.calcVarHoliday(base, int(row[2]))
-                        holidaysList.append(((dt.year), str(dt.month), str(dt.day), row[4], row[5]))
-                        self.year = self.year - 1
                     elif row[1] == "easterO" :
                         base=self.calcEasterO()
                         dt=self.calcVarHoliday(base, int(row[2]))
                         holidaysList.append(((dt.year), str(dt.month), str(dt.day), row[4], row[5]))
-                        self.year =self. year + 1
-                        base=self.calcEaster()
-                        dt=self.calcVarHoliday(base, int(row[2]))
-                        holidaysList.append(((dt.year), str(dt.month), str(dt.day), row[4], row[5]))
-                        self.year = self.year - 1
                 else:
                     pass #do nothing
-            except:
-                print("Not a valid Holidays file.\nHolidays wil NOT be shown.")
-                messageBox("Warning:",
-                    "Not a valid Holidays file.\nHolidays wil NOT be shown.",
-                    ICON_CRITICAL)
-                break
-        csvfile.close()
+            except (IndexError, ValueError):
+                return holidaysList, False
+        return holidaysList, True
+
+    def resolveIcsFile(self, icsFile, firstYear, lastYear):
+        """ Import the events of an iCalendar file for the years firstYear to lastYear,
+        in one pass through the file. Recurring events are only expanded within
+        these years. Returns {year: (holidays, True)} or None if the file can not
+        be opened."""
+        start = datetime.date(firstYear, 1, 1)
+        end = datetime.date(lastYear, 12, 31)
+        years = dict((str(year), (list(), True)) for year in range(firstYear, lastYear + 1))
+        kinds = dict(icsCategories)
+        try:
+            icsfile = open(icsFile, mode="rt", encoding="utf8")
+        except (OSError, ValueError):
+            return None
+        skipped = 0
+        occurrences = list() # (uid, first day, number of days, text, kind, of an RRULE)
+        moved = dict() # uid -> dates of the occurrences that are replaced (RECURRENCE-ID)
+        with icsfile:
+            try:
+                for event in self.icsEvents(icsfile):
+                    uid = event.get("UID", ("", ""))[1]
+                    cancelled = event.get("STATUS", ("", ""))[1].upper() == "CANCELLED"
+                    try:
+                        if "RECURRENCE-ID" in event: # an EXDATE of the recurring event
+                            moved.setdefault(uid, set()).add(self.icsDate(event["RECURRENCE-ID"][1]))
+                        if cancelled:
+                            continue
+                        dtstart = self.icsDate(event["DTSTART"][1])
+                        if "DTEND" in event:
+                            dtend = self.icsDate(event["DTEND"][1])
+                            if len(event["DTEND"][1]) > 8 and event["DTEND"][1][9:15] not in ("", "000000"):
+                                dtend += timedelta(days=1) # ends during the day
+                        elif "DURATION" in event:
+                            dtend = dtstart + self.icsDuration(event["DURATION"][1])
+                        else:
+                            dtend = dtstart + timedelta(days=1)
+                        nrDays = max(1, (dtend - dtstart).days)
+                        if "RRULE" in event and "RECURRENCE-ID" not in event:
+                            exdates = set(self.icsDate(x) for x in event.get("EXDATE", ("", ""))[1].split(",") if x)
+                            starts = [day for day in self.expandRrule(dtstart, event["RRULE"][1],
+                                start - timedelta(days=nrDays - 1), end) if day not in exdates]
+                        elif dtstart + timedelta(days=nrDays - 1) >= start and dtstart <= end:
+                            starts = [dtstart]
+                        else:
+                            continue
+                    except (KeyError, IndexError, ValueError):
+                        skipped += 1
+                        continue
+                    summary = self.icsText(event.get("SUMMARY", ("", ""))[1])
+                    kind = "1" if nrDays == 1 else ""
+                    for category in self.icsText(event.get("CATEGORIES", ("", ""))[1]).split(","):
+                        if category.strip().upper() in kinds:
+                            kind = kinds[category.strip().upper()]
+                            break
+                    recurring = "RRULE" in event and "RECURRENCE-ID" not in event
+                    for first in starts:
+                        occurrences.append((uid, first, nrDays, summary, kind, recurring))
+            except UnicodeDecodeError as err:
+                self.warn("'%s' is not a UTF-8 file (%s).\nHolidays wil NOT be shown." % (icsFile, err))
+                return None
+        # the moved occurrences may come after their recurring event in the file
+        for uid, first, nrDays, summary, kind, recurring in occurrences:
+            if recurring and first in moved.get(uid, ()):
+                continue
+            for i in range(nrDays):
+                day = first + timedelta(days=i)
+                if day < start or day > end:
+                    continue
+                if nrDays == 1:
+                    text = summary
+                elif i == 0:
+                    text = summary + "→"
+                elif i == nrDays - 1:
+                    text = "←" + summary
+                else:
+                    text = ""
+                years[str(day.year)][0].append((day.year, str(day.month), str(day.day), text, kind))
+        if skipped > 0:
+            self.warn("%d events of '%s' could not be imported." % (skipped, icsFile))
+        return years
+
+    def icsEvents(self, icsfile):
+        """ Read the events of an iCalendar file one at a time, as a dictionary of
+        property name -> (parameters, value). Folded lines are unfolded. Properties of
+        components within an event (e.g. VALARM) are skipped."""
+        event = None
+        nested = 0 # depth of the components within the event
+        for line in self.icsLines(icsfile):
+            name, sep, value = line.partition(":")
+            while name.count('"') % 2 == 1 and sep: # ':' within a quoted parameter
+                more, sep, value = value.partition(":")
+                name = name + ":" + more
+            name, sep, params = name.partition(";")
+            name = name.upper()
+            if name == "BEGIN" and value.upper() == "VEVENT":
+                event = dict()
+                nested = 0
+            elif name == "END" and value.upper() == "VEVENT":
+                if event is not None:
+                    yield event
+                event = None
+            elif event is None:
+                continue
+            elif name == "BEGIN":
+                nested += 1
+            elif name == "END":
+                nested = max(0, nested - 1)
+            elif nested == 0:
+                if name == "EXDATE" and name in event: # may be given more than once
+                    value = event[name][1] + "," + value
+                event[name] = (params, value)
+
+    def icsLines(self, icsfile):
+        """ Unfolded lines of an iCalendar file."""
+        line = None
+        for nextLine in icsfile:
+            nextLine = nextLine.rstrip("\r\n")
+            if nextLine[:1] in (" ", "\t") and line is not None:
+                line += nextLine[1:]
+                continue
+            if line:
+                yield line
+            line = nextLine
+        if line:
+            yield line
+
+    def icsDate(self, value):
+        """ Date of an iCalendar DATE or DATE-TIME value."""
+        return datetime.date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+    def icsDuration(self, value):
+        """ Whole days of an iCalendar DURATION value (e.g. 'P3D' or 'P1W')."""
+        days = 0
+        number = ""
+        for c in value.split("T")[0]:
+            if c.isdigit():
+                number += c
+            elif c == "W":
+                days += 7 * int(number)
+                number = ""
+            elif c == "D":
+                days += int(number)
+                number = ""
+        return timedelta(days=max(1, days))
+
+    def icsText(self, value):
+        """ Unescape an iCalendar TEXT value."""
+        return (value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",")
+            .replace("\\;", ";").replace("\\\\", "\\"))
+
+    def expandRrule(self, dtstart, rrule, start, end):
+        """ Start dates of the occurrences of a recurring event (RRULE with FREQ
+        YEARLY, MONTHLY, WEEKLY or DAILY, INTERVAL, COUNT, UNTIL, BYMONTH,
+        BYMONTHDAY and BYDAY) between start and end. Periods before start are
+        skipped, unless the occurrences must be counted."""
+        parts = dict(p.split("=", 1) for p in rrule.upper().split(";") if "=" in p)
+        freq = parts.get("FREQ", "YEARLY")
+        interval = int(parts.get("INTERVAL", "1"))
+        if interval < 1:
+            raise ValueError("INTERVAL must be 1 or more")
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        last = end
+        if "UNTIL" in parts:
+            last = min(end, self.icsDate(parts["UNTIL"]))
+        byMonth = [int(m) for m in parts["BYMONTH"].split(",")] if "BYMONTH" in parts else None
+        byMonthDay = ([int(d) for d in parts["BYMONTHDAY"].split(",")]
+            if "BYMONTHDAY" in parts else None)
+        byDay = ([(int(d[:-2] or 0), ["MO", "TU", "WE", "TH", "FR", "SA", "SU"].index(d[-2:]))
+            for d in parts["BYDAY"].split(",")] if "BYDAY" in parts else None)
+        period = 0
+        if count is None and start > dtstart: # skip to the period before start
+            if freq == "YEARLY":
+                period = (start.year - dtstart.year) // interval
+            elif freq == "MONTHLY":
+                period = ((start.year - dtstart.year) * 12 + start.month - dtstart.month) // interval
+            elif freq == "WEEKLY":
+                period = (start - dtstart).days // (7 * interval)
+            else:
+                period = (start - dtstart).days // interval
+            period = max(0, period - 1)
+        nr = 0
+        while True:
+            first, days = self.rrulePeriod(freq, dtstart, interval * period, byMonth,
+                byMonthDay, byDay)
+            if first is None or first > last:
+                return
+            for day in days:
+                if day < dtstart:
+                    continue
+                if day > last:
+                    return
+                nr += 1
+                if count is not None and nr > count:
+                    return
+                if day >= start:
+                    yield day
+            period += 1
+
+    def rrulePeriod(self, freq, dtstart, n, byMonth, byMonthDay, byDay):
+        """ First date and sorted dates of a recurring event of the n-th period (year,
+        month, week or day) after the period of dtstart. The first date is None
+        after the last date the calendar can show."""
+        try:
+            if freq == "YEARLY":
+                year = dtstart.year + n
+                first = datetime.date(year, 1, 1)
+                if byDay and not byMonth and not byMonthDay: # n-th weekday of the year
+                    days = list()
+                    for nth, wd in byDay:
+                        matching = [first + timedelta(days=d) for d in range((wd - first.weekday()) % 7,
+                            366 if calendar.isleap(year) else 365, 7)]
+                        if nth == 0:
+                            days.extend(matching)
+                        elif abs(nth) <= len(matching):
+                            days.append(matching[nth - 1] if nth > 0 else matching[nth])
+                    return first, sorted(set(days))
+                return first, [day for month in sorted(byMonth or [dtstart.month])
+                    for day in self.rruleMonth(year, month, dtstart, byMonthDay, byDay)]
+            elif freq == "MONTHLY":
+                month = dtstart.month - 1 + n
+                year = dtstart.year + month // 12
+                month = month % 12 + 1
+                first = datetime.date(year, month, 1)
+                if byMonth and month not in byMonth:
+                    return first, []
+                return first, self.rruleMonth(year, month, dtstart, byMonthDay, byDay)
+            elif freq == "WEEKLY":
+                first = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=n)
+                weekdays = [wd for nth, wd in byDay] if byDay else [dtstart.weekday()]
+                return first, [first + timedelta(days=wd) for wd in sorted(set(weekdays))
+                    if not byMonth or (first + timedelta(days=wd)).month in byMonth]
+            else: # DAILY
+                first = dtstart + timedelta(days=n)
+                if ((byMonth and first.month not in byMonth) or
+                        (byMonthDay and first.day not in byMonthDay) or
+                        (byDay and first.weekday() not in [wd for nth, wd in byDay])):
+                    return first, []
+                return first, [first]
+        except (OverflowError, ValueError): # beyond year 9999
+            return None, []
+
+    def rruleMonth(self, year, month, dtstart, byMonthDay, byDay):
+        """ Sorted dates of a recurring event within one month."""
+        daysInMonth = calendar.monthrange(year, month)[1]
+        days = list()
+        if byMonthDay:
+            for d in byMonthDay:
+                if d < 0:
+                    d = daysInMonth + d + 1
+                if 1 <= d <= daysInMonth:
+                    days.append(d)
+            if byDay:
+                days = [d for d in days
+                    if datetime.date(year, month, d).weekday() in [wd for nth, wd in byDay]]
+        elif byDay:
+            for nth, wd in byDay:
+                matching = [d for d in range(1, daysInMonth + 1)
+                    if datetime.date(year, month, d).weekday() == wd]
+                if nth == 0:
+                    days.extend(matching)
+                elif abs(nth) <= len(matching):
+                    days.append(matching[nth - 1] if nth > 0 else matching[nth])
+        elif dtstart.day <= daysInMonth:
+            days.append(dtstart.day)
+        return [datetime.date(year, month, d) for d in sorted(set(days))]
+
+    def selectHolidays(self, holidaysList, stmonth):
+        """ Holidays of the 12 months from the start month, sorted on date."""
+        year = self.year
+        x = 0
+        y = len(holidaysList)
+        while x < y:
+            if ((holidaysList[x][0] == year and int(holidaysList[x][1]) < stmonth) or
+                (holidaysList[x][0] == year+1 and int(holidaysList[x][1]) >= stmonth)):
+                del holidaysList[x] # delete holidays not needed and reset counters
+                x = x - 1
+                y = y - 1
+            x = x + 1
+        holidaysList.sort(key = lambda i: int(i[2])) # sort on day
+        holidaysList.sort(key = lambda i: int(i[1])) # sort on month
+        holidaysList.sort(key = lambda i: i[0]) # sort on year
         return holidaysList
 
+    def mergeHolidays(self, holidaysLists):
+        """ Merge the holidays of several files, in order of precedence."""
+        def dateKind(h):
+            return (h[0], h[1], h[2], h[4] if h[4] in ("", "0") else "1")
+        merged = list()
+        for holidaysList in holidaysLists:
+            dates = set(dateKind(h) for h in holidaysList)
+            merged = [h for h in merged if dateKind(h) not in dates]
+            merged.extend(holidaysList)
+        return merged
+
+######################################################
+class calcAstro:
+    """ Moon phases and sunrise / sunset times for all days of a year, computed
+    in one pass over the year from series expansions: the principal moon phases
+    of J. Meeus, Astronomical Algorithms, chapter 49, and the NOAA solar equations
+    (accurate to a few minutes). No network or extra packages are needed."""
+
+    # periodic terms of the moon phases: coefficient (days), power of E and the
+    # multiples of M, M', F and Omega in the argument of the sine
+    newMoonTerms = [(-0.40720, 0, 0, 1, 0, 0), (0.17241, 1, 1, 0, 0, 0),
+        (0.01608, 0, 0, 2, 0, 0), (0.01039, 0, 0, 0, 2, 0), (0.00739, 1, -1, 1, 0, 0),
+        (-0.00514, 1, 1, 1, 0, 0), (0.00208, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0),
+        (-0.00057, 0, 0, 1, 2, 0), (0.00056, 1, 1, 2, 0, 0), (-0.00042, 0, 0, 3, 0, 0),
+        (0.00042, 1, 1, 0, 2, 0), (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0),
+        (-0.00017, 0, 0, 0, 0, 1)]
+    fullMoonTerms = [(-0.40614, 0, 0, 1, 0, 0), (0.17302, 1, 1, 0, 0, 0),
+        (0.01614, 0, 0, 2, 0, 0), (0.01043, 0, 0, 0, 2, 0), (0.00734, 1, -1, 1, 0, 0),
+        (-0.00515, 1, 1, 1, 0, 0), (0.00209, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0),
+        (-0.00057, 0, 0, 1, 2, 0), (0.00056, 1, 1, 2, 0, 0), (-0.00042, 0, 0, 3, 0, 0),
+        (0.00042, 1, 1, 0, 2, 0), (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0),
+        (-0.00017, 0, 0, 0, 0, 1)]
+    quarterTerms = [(-0.62801, 0, 0, 1, 0, 0), (0.17172, 1, 1, 0, 0, 0),
+        (-0.01183, 1, 1, 1, 0, 0), (0.00862, 0, 0, 2, 0, 0), (0.00804, 0, 0, 0, 2, 0),
+        (0.00454, 1, -1, 1, 0, 0), (0.00204, 2, 2, 0, 0, 0), (-0.00180, 0, 0, 1, -2, 0),
+        (-0.00070, 0, 0, 1, 2, 0), (-0.00040, 0, 0, 3, 0, 0), (-0.00034, 1, -1, 2, 0, 0),
+        (0.00032, 1, 1, 0, 2, 0), (0.00032, 1, 1, 0, -2, 0), (-0.00028, 2, 2, 1, 0, 0),
+        (0.00027, 1, 1, 2, 0, 0), (-0.00017, 0, 0, 0, 0, 1)]
+
+    def __init__(self, year, location=None):
+        self.year = year
+        self.location = location # entry of the locations list, or None for the
+                                 # time zone of this computer (moon phases only)
+
+    def tables(self):
+        """ Moon phase (0 new moon, 1 first quarter, 2 full moon, 3 last quarter)
+        per date and sunrise and sunset time (minutes after midnight, None if the
+        sun does not rise or set) per date. """
+        sun = dict()
+        if self.location is not None:
+            sun = self.calcSunTimes()
+        return self.calcMoonPhases(), sun
+
+    def calcMoonPhases(self):
+        """ Local dates of the principal moon phases of the year. """
+        phases = dict()
+        rad = math.pi / 180
+        k0 = math.floor((self.year - 2000) * 12.3685) - 1 # lunation before the year
+        for k in range(k0, k0 + 15):
+            for phase in range(4):
+                kq = k + phase / 4
+                T = kq / 1236.85
+                jde = (2451550.09766 + 29.530588861 * kq + 0.00015437 * T**2
+                    - 0.000000150 * T**3 + 0.00000000073 * T**4)
+                E = 1 - 0.002516 * T - 0.0000074 * T**2
+                M = (2.5534 + 29.10535670 * kq - 0.0000014 * T**2 - 0.00000011 * T**3) * rad
+                Mm = (201.5643 + 385.81693528 * kq + 0.0107582 * T**2 + 0.00001238 * T**3
+                    - 0.000000058 * T**4) * rad
+                F = (160.7108 + 390.67050284 * kq - 0.0016118 * T**2 - 0.00000227 * T**3
+                    + 0.000000011 * T**4) * rad
+                Om = (124.7746 - 1.56375588 * kq + 0.0020672 * T**2 + 0.00000215 * T**3) * rad
+                terms = (self.newMoonTerms, self.quarterTerms, self.fullMoonTerms,
+                    self.quarterTerms)[phase]
+                for coef, power, m, mm, f, om in terms:
+                    jde += coef * E**power * math.sin(m * M + mm * Mm + f * F + om * Om)
+                if phase % 2 == 1:
+                    W = (0.00306 - 0.00038 * E * math.cos(M) + 0.00026 * math.cos(Mm)
+                        - 0.00002 * math.cos(Mm - M) + 0.00002 * math.cos(Mm + M)
+                        + 0.00002 * math.cos(2 * F))
+                    jde += W if phase == 1 else -W
+                day = self.localTime(jde - 69 / 86400.0).date() # TT -> UTC (delta T)
+                if day.year == self.year:
+                    phases[day] = phase
+        return phases
+
+    def calcSunTimes(self):
+        """ Local sunrise and sunset per date of the year. """
+        times = dict()
+        rad = math.pi / 180
+        latitude, longitude = self.location[1:3]
+        first = date(self.year, 1, 1)
+        daysInYear = (date(self.year + 1, 1, 1) - first).days
+        cosZenith = math.cos(90.833 * rad) # refraction and radius of the sun
+        for n in range(daysInYear):
+            day = first + timedelta(days=n)
+            g = 2 * math.pi / daysInYear * n # fractional year at noon
+            eqTime = 229.18 * (0.000075 + 0.001868 * math.cos(g) - 0.032077 * math.sin(g)
+                - 0.014615 * math.cos(2 * g) - 0.040849 * math.sin(2 * g))
+            decl = (0.006918 - 0.399912 * math.cos(g) + 0.070257 * math.sin(g)
+                - 0.006758 * math.cos(2 * g) + 0.000907 * math.sin(2 * g)
+                - 0.002697 * math.cos(3 * g) + 0.00148 * math.sin(3 * g))
+            x = (cosZenith / (math.cos(latitude * rad) * math.cos(decl))
+                - math.tan(latitude * rad) * math.tan(decl))
+            if x < -1 or x > 1: # midnight sun or polar night
+                times[day] = (None, None)
+                continue
+            hourAngle = math.acos(x) / rad
+            offset = 60 * self.utcOffset(datetime.datetime(self.year, day.month, day.day, 12)
+                - timedelta(hours=self.location[3]))
+            times[day] = (int(round(720 - 4 * (longitude + hourAngle) - eqTime + offset)),
+                int(round(720 - 4 * (longitude - hourAngle) - eqTime + offset)))
+        return times
+
+    def localTime(self, jd):
+        """ Local date and time of a Julian day (UTC). """
+        if self.location is None: # time zone and daylight saving time of this computer
+            return datetime.datetime.fromtimestamp((jd - 2440587.5) * 86400.0)
+        utc = datetime.datetime(1970, 1, 1) + timedelta(days=jd - 2440587.5)
+        return utc + timedelta(hours=self.utcOffset(utc))
+
+    def utcOffset(self, utc):
+        """ Hours from UTC at the location, daylight saving time included. """
+        zone, rule = self.location[3:5]
+        year = utc.year
+        if rule == 'EU': # last Sunday of March and October, 01:00 UTC
+            start = datetime.datetime(year, 3, 31 - (date(year, 3, 31).weekday() + 1) % 7, 1)
+            end = datetime.datetime(year, 10, 31 - (date(year, 10, 31).weekday() + 1) % 7, 1)
+        elif rule == 'US': # second Sunday of March and first Sunday of November, 02:00
+            start = datetime.datetime(year, 3, 8 + (6 - date(year, 3, 8).weekday()), 2)
+            start -= timedelta(hours=zone)
+            end = datetime.datetime(year, 11, 1 + (6 - date(year, 11, 1).weekday()), 2)
+            end -= timedelta(hours=zone + 1)
+        else:
+            return zone
+        if start <= utc < end:
+            return zone + 1
+        return zone
+
 ######################################################
 class TkCalendar(Frame):
     """ GUI interface for Scribus calendar wizard with tkinter"""
@@ -699,17 +1817,99 @@ class TkCalendar(Frame):
         self.holidaysLabel = Label(self, text='Show holidays:')
         self.holidaysVar = IntVar()
         self.holidaysCheck = Checkbutton(self, variable=self.holidaysVar)
+        self.holidaysFilesLabel = Label(self, text='Holidays file(s):')
+        self.holidaysFilesVar = StringVar()
+        self.holidaysFilesEntry = Entry(self, textvariable=self.holidaysFilesVar, width=24)
+        self.holidaysBrowseButton = Button(self, text="Browse", command=self.holidaysBrowse)
 
         # legend
         self.legendLabel = Label(self, text='Show holiday texts:')
         self.legendVar = IntVar()
         self.legendCheck = Checkbutton(self, variable=self.legendVar)
 
+        # clone month layout
+        self.cloneLabel = Label(self, text='Clone month layout (faster):')
+        self.cloneVar = IntVar()
+        self.cloneCheck = Checkbutton(self, variable=self.cloneVar)
+
+        # page of the new document (pt), filled from the open document
+        self.pageWLabel = Label(self, text='Page width (pt):')
+        self.pageWVar = DoubleVar()
+        self.pageWEntry = Entry(self, textvariable=self.pageWVar, width=7)
+        self.pageHLabel = Label(self, text='Page height (pt):')
+        self.pageHVar = DoubleVar()
+        self.pageHEntry = Entry(self, textvariable=self.pageHVar, width=7)
+        self.pageTopLabel = Label(self, text='Top margin (pt):')
+        self.pageTopVar = DoubleVar()
+        self.pageTopEntry = Entry(self, textvariable=self.pageTopVar, width=7)
+        self.pageBottomLabel = Label(self, text='Bottom margin (pt):')
+        self.pageBottomVar = DoubleVar()
+        self.pageBottomEntry = Entry(self, textvariable=self.pageBottomVar, width=7)
+        self.pageLeftLabel = Label(self, text='Left margin (pt):')
+        self.pageLeftVar = DoubleVar()
+        self.pageLeftEntry = Entry(self, textvariable=self.pageLeftVar, width=7)
+        self.pageRightLabel = Label(self, text='Right margin (pt):')
+        self.pageRightVar = DoubleVar()
+        self.pageRightEntry = Entry(self, textvariable=self.pageRightVar, width=7)
+
+        # cards per page (credit card or pocket calendars)
+        self.cardWLabel = Label(self, text='Card width (pt), \n0 = no cards:')
+        self.cardWVar = DoubleVar()
+        self.cardWEntry = Entry(self, textvariable=self.cardWVar, width=7)
+        self.cardHLabel = Label(self, text='Card height (pt):')
+        self.cardHVar = DoubleVar()
+        self.cardHEntry = Entry(self, textvariable=self.cardHVar, width=7)
+        self.bleedLabel = Label(self, text='Bleed (pt):')
+        self.bleedVar = DoubleVar()
+        self.bleedEntry = Entry(self, textvariable=self.bleedVar, width=7)
+        self.gutterLabel = Label(self, text='Gutter (pt):')
+        self.gutterVar = DoubleVar()
+        self.gutterEntry = Entry(self, textvariable=self.gutterVar, width=7)
+        self.cropMarksLabel = Label(self, text='Crop marks:')
+        self.cropMarksVar = IntVar()
+        self.cropMarksCheck = Checkbutton(self, variable=self.cropMarksVar)
+
+        # weekend days
+        self.weekendLabel = Label(self, text='Weekend:')
+        self.weekendVar = StringVar()
+        self.weekendMenu = OptionMenu(self, self.weekendVar, *[x[0] for x in weekendMasks])
+
+        # moon phases and sunrise / sunset
+        self.moonLabel = Label(self, text='Moon phases:')
+        self.moonVar = IntVar()
+        self.moonCheck = Checkbutton(self, variable=self.moonVar)
+        self.sunLabel = Label(self, text='Sunrise / sunset:')
+        self.sunVar = StringVar()
+        self.sunMenu = OptionMenu(self, self.sunVar, 'None', *[x[0] for x in locations])
+
         # closing/running
         self.okButton = Button(self, text="OK", width=6, command=self.okButton_pressed)
         self.cancelButton = Button(self, text="Cancel", command=self.quit)
 
+        # layout preview (page of the open document, else A4 with 40 pt margins)
+        self.previewCanvas = Canvas(self, width=240, height=340, bg="gray80")
+        self.previewJob = None
+        self.holidaysList = list()
+        # holidays are read in the background, see scheduleHolidays()
+        self.holidayIndex = None
+        self.holidaysToken = 0
+        self.holidaysLoaded = -1 # token of the holidays in holidaysList
+        self.holidaysThread = None
+        self.holidaysQueue = queue.Queue()
+        if haveDoc() > 0:
+            unit = getUnit()
+            setUnit(UNIT_POINTS)
+            page = tuple(getPageSize()) + tuple(getPageMargins())
+            setUnit(unit)
+        else: # A4
+            page = (595.28, 841.89, 40.0, 40.0, 40.0, 40.0)
+        for var, value in zip((self.pageWVar, self.pageHVar, self.pageTopVar, self.pageLeftVar,
+                self.pageRightVar, self.pageBottomVar), page):
+            var.set(round(value, 2))
+
         # setup values
+        self.weekendVar.set(weekendMasks[0][0])
+        self.sunVar.set('None')
         self.startyrVar.set(str(datetime.date(1, 1, 1).today().year+1)) # +1 for next year
         self.startmthVar.set("1")
         self.nrHmthsVar.set("3")
@@ -720,6 +1920,10 @@ class TkCalendar(Frame):
         self.offsetYVar.set("0.0")
         self.marginXVar.set("0.0")
         self.marginYVar.set("0.0")
+        self.cardWVar.set("0.0")
+        self.cardHVar.set("0.0")
+        self.bleedVar.set("0.0")
+        self.gutterVar.set("0.0")
         #self.imageCheck.select()
         self.holidaysCheck.select()
         self.legendCheck.select()
@@ -727,7 +1931,7 @@ class TkCalendar(Frame):
         # make layout
         self.columnconfigure(0, pad=6)
         currRow = 0
-        self.statusLabel.grid(column=0, row=currRow, columnspan=4)
+        self.statusLabel.grid(column=0, row=currRow, columnspan=5)
         currRow += 1
         self.langLabel.grid(column=0, row=currRow, sticky=W)
         self.fontLabel.grid(column=1, row=currRow, sticky=W) 
@@ -774,12 +1978,68 @@ class TkCalendar(Frame):
         self.legendLabel.grid(column=2, row=currRow, sticky=N+E)
         self.legendCheck.grid(column=3, row=currRow, sticky=N+W)
         currRow += 1
+        self.holidaysFilesLabel.grid(column=0, row=currRow, sticky=E)
+        self.holidaysFilesEntry.grid(column=1, row=currRow, columnspan=2, sticky=W+E)
+        self.holidaysBrowseButton.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
+        self.cardWLabel.grid(column=0, row=currRow, sticky=N+E)
+        self.cardWEntry.grid(column=1, row=currRow, sticky=W)
+        self.cardHLabel.grid(column=2, row=currRow, sticky=E)
+        self.cardHEntry.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
+        self.bleedLabel.grid(column=0, row=currRow, sticky=N+E)
+        self.bleedEntry.grid(column=1, row=currRow, sticky=N+W)
+        self.gutterLabel.grid(column=2, row=currRow, sticky=N+E)
+        self.gutterEntry.grid(column=3, row=currRow, sticky=N+W)
+        currRow += 1
+        self.cropMarksLabel.grid(column=0, row=currRow, sticky=N+E)
+        self.cropMarksCheck.grid(column=1, row=currRow, sticky=N+W)
+        self.cloneLabel.grid(column=2, row=currRow, sticky=N+E)
+        self.cloneCheck.grid(column=3, row=currRow, sticky=N+W)
+        currRow += 1
+        self.pageWLabel.grid(column=0, row=currRow, sticky=E)
+        self.pageWEntry.grid(column=1, row=currRow, sticky=W)
+        self.pageHLabel.grid(column=2, row=currRow, sticky=E)
+        self.pageHEntry.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
+        self.pageTopLabel.grid(column=0, row=currRow, sticky=E)
+        self.pageTopEntry.grid(column=1, row=currRow, sticky=W)
+        self.pageBottomLabel.grid(column=2, row=currRow, sticky=E)
+        self.pageBottomEntry.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
+        self.pageLeftLabel.grid(column=0, row=currRow, sticky=E)
+        self.pageLeftEntry.grid(column=1, row=currRow, sticky=W)
+        self.pageRightLabel.grid(column=2, row=currRow, sticky=E)
+        self.pageRightEntry.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
+        self.weekendLabel.grid(column=0, row=currRow, sticky=E)
+        self.weekendMenu.grid(column=1, row=currRow, columnspan=2, sticky=W)
+        currRow += 1
+        self.moonLabel.grid(column=0, row=currRow, sticky=E)
+        self.moonCheck.grid(column=1, row=currRow, sticky=W)
+        self.sunLabel.grid(column=2, row=currRow, sticky=E)
+        self.sunMenu.grid(column=3, row=currRow, sticky=W)
+        currRow += 1
         self.rowconfigure(currRow, pad=6)
         self.okButton.grid(column=1, row=currRow, sticky=E)
         self.cancelButton.grid(column=2, row=currRow, sticky=W)
+        self.previewCanvas.grid(column=4, row=1, rowspan=currRow, padx=6, pady=6, sticky=N)
 
         # fill the months values
         self.realLangChange()
+        # redraw the preview on every change of the layout
+        for var in (self.startyrVar, self.startmthVar, self.nrHmthsVar, self.weekVar,
+                self.weekNrVar, self.offsetXVar, self.offsetYVar, self.marginXVar,
+                self.marginYVar, self.imageVar, self.legendVar, self.cardWVar,
+                self.cardHVar, self.bleedVar, self.gutterVar, self.cropMarksVar,
+                self.weekendVar, self.pageWVar, self.pageHVar, self.pageTopVar,
+                self.pageLeftVar, self.pageRightVar, self.pageBottomVar):
+            var.trace_add('write', self.schedulePreview)
+        # read the holidays again when the year or the files change
+        for var in (self.startyrVar, self.startmthVar, self.holidaysVar, self.holidaysFilesVar):
+            var.trace_add('write', self.scheduleHolidays)
+        self.drawPreview()
+        self.checkHolidays()
 
     def languageChange(self):
         """ Called by Change button. Get language list value and
@@ -790,17 +2050,11 @@ class TkCalendar(Frame):
             return
         langX = self.langListbox.get(ix[0])
         self.lang = langX
-        if os == "Windows":
-            x = langX
-        else: # Linux
-            iy = [[x[0] for x in localization].index(self.lang)]
-            x = (localization[iy[0]][2])
         try:
-            locale.setlocale(locale.LC_CTYPE, x)
-            locale.setlocale(locale.LC_TIME, x)
+            setCalendarLocale(langX)
         except locale.Error:
-            print("Language " + x + " is not installed on your operating system.")
-            self.statusVar.set("Language '" + x + "' is not installed on your operating system")
+            print("Language " + langX + " is not installed on your operating system.")
+            self.statusVar.set("Language '" + langX + "' is not installed on your operating system")
             return
         self.realLangChange(langX)
 
@@ -822,8 +2076,77 @@ class TkCalendar(Frame):
             return
         self.font = self.fontListbox.get(ix[0])
 
-    def okButton_pressed(self):
-        """ User variables testing and preparing """
+    def holidaysBrowse(self):
+        """ Called by Browse button. Files are separated by ';' in the entry. """
+        holidaysFiles = filedialog.askopenfilenames(title="Open the \
+'holidays.txt'-file(s)")
+        if len(holidaysFiles) > 0:
+            self.holidaysFilesVar.set(';'.join(holidaysFiles))
+
+    def holidaysFiles(self):
+        return [x.strip() for x in self.holidaysFilesVar.get().split(';') if x.strip() != '']
+
+    def scheduleHolidays(self, *args):
+        """ Start reading the holidays files in a worker thread. Results of an
+            older start (another year or other files) are dropped by checkHolidays(). """
+        self.holidaysToken += 1
+        self.holidaysList = list()
+        self.holidayIndex = None
+        self.holidaysThread = None
+        yearMonth = self.readYearMonth()
+        holidaysFiles = self.holidaysFiles()
+        if yearMonth is None or self.holidaysVar.get() == 0 or len(holidaysFiles) == 0:
+            self.schedulePreview()
+            return
+        self.statusVar.set('Reading holidays...')
+        self.holidaysThread = threading.Thread(target=self.loadHolidays, daemon=True,
+            args=(self.holidaysToken, holidaysFiles) + yearMonth)
+        self.holidaysThread.start()
+
+    def readYearMonth(self):
+        """ Start year and start month, or None if one of them is not valid.
+            The holidays depend on these fields only. """
+        try:
+            year = self.startyrVar.get().strip()
+            stmonth = int(self.startmthVar.get().strip(), 10)
+            if len(year) != 4 or stmonth < 1 or stmonth > 12:
+                return None
+            return (int(year, 10), stmonth)
+        except ValueError:
+            return None
+
+    def loadHolidays(self, token, holidaysFiles, year, stmonth):
+        """ Worker thread: no Tk calls here, the result (or the error, with no
+            holidays) always goes to the queue. """
+        try:
+            hol = calcHolidays(year, quiet=True)
+            holidaysList = hol.selectHolidays(hol.importHolidays(holidaysFiles), stmonth)
+            self.holidaysQueue.put((token, holidaysList, buildHolidayIndex(holidaysList),
+                hol.warnings))
+        except Exception as err:
+            self.holidaysQueue.put((token, list(), dict(),
+                ["Holidays wil NOT be shown: %s" % err]))
+
+    def checkHolidays(self, poll=True):
+        """ Take the holidays of the worker thread, if they are still wanted. """
+        while not self.holidaysQueue.empty():
+            token, holidaysList, holidayIndex, warnings = self.holidaysQueue.get()
+            if token != self.holidaysToken:
+                continue
+            self.holidaysLoaded = token
+            self.holidaysList = holidaysList
+            self.holidayIndex = holidayIndex
+            if len(warnings) > 0:
+                self.statusVar.set(warnings[0])
+            else:
+                self.statusVar.set('%d holidays read.' % len(holidaysList))
+            self.schedulePreview()
+        if poll:
+            self.after(50, self.checkHolidays)
+
+    def readOptions(self, quiet=False):
+        """ User variables testing and preparing. Returns the calendar options
+            or None (with a status message, unless quiet) if a value is wrong. """
         # start year
         try:
             year = self.startyrVar.get().strip()
@@ -831,8 +2154,9 @@ class TkCalendar(Frame):
                 raise ValueError
             year = int(year, 10)
         except ValueError:
-            self.statusVar.set('Year must be in the "YYYY" format e.g. 2020.')
-            return
+            if not quiet:
+                self.statusVar.set('Year must be in the "YYYY" format e.g. 2020.')
+            return None
         # start month
         try:
             stmonth = self.startmthVar.get().strip()
@@ -846,8 +2170,9 @@ class TkCalendar(Frame):
                      j = j - 12
                  months.append(int(j))
         except ValueError:
-            self.statusVar.set('Start month must be between 1 and 12.')
-            return
+            if not quiet:
+                self.statusVar.set('Start month must be between 1 and 12.')
+            return None
         # number of months per row
         try:
             nrHmonths = self.nrHmthsVar.get().strip()
@@ -855,18 +2180,55 @@ class TkCalendar(Frame):
                 raise ValueError
             nrHmonths = int(nrHmonths, 10)
         except ValueError:
-            self.statusVar.set('Number of months per row must be between 1 and 12.')
-            return
-        # inner margins
-        if ((float(self.offsetXVar.get()) - float(self.marginXVar.get())) < 0 
-            or (float(self.offsetYVar.get()) - float(self.marginYVar.get())) < 0):
-            self.statusVar.set('Inner margins must be less than offsets.')
-            return
-        # fonts
-        fonts = getFontNames()
-        if self.font not in fonts:
-            self.statusVar.set('Please select a font.')
-            return
+            if not quiet:
+                self.statusVar.set('Number of months per row must be between 1 and 12.')
+            return None
+        # offsets and inner margins
+        try:
+            offsetX = float(self.offsetXVar.get())
+            offsetY = float(self.offsetYVar.get())
+            marginX = float(self.marginXVar.get())
+            marginY = float(self.marginYVar.get())
+        except (ValueError, TclError):
+            if not quiet:
+                self.statusVar.set('Offsets and inner margins must be numbers.')
+            return None
+        if (offsetX - marginX) < 0 or (offsetY - marginY) < 0:
+            if not quiet:
+                self.statusVar.set('Inner margins must be less than offsets.')
+            return None
+        # page of the new document
+        try:
+            pageSize = (float(self.pageWVar.get()), float(self.pageHVar.get()))
+            pageMargins = (float(self.pageTopVar.get()), float(self.pageLeftVar.get()),
+                float(self.pageRightVar.get()), float(self.pageBottomVar.get()))
+        except (ValueError, TclError):
+            if not quiet:
+                self.statusVar.set('Page size and margins must be numbers.')
+            return None
+        if (min(pageMargins) < 0 or pageMargins[1] + pageMargins[2] >= pageSize[0]
+                or pageMargins[0] + pageMargins[3] >= pageSize[1]):
+            if not quiet:
+                self.statusVar.set('The page margins must fit within the page.')
+            return None
+        # cards per page
+        try:
+            cardW = float(self.cardWVar.get())
+            cardH = float(self.cardHVar.get())
+            bleed = float(self.bleedVar.get())
+            gutter = float(self.gutterVar.get())
+        except (ValueError, TclError):
+            if not quiet:
+                self.statusVar.set('Card size, bleed and gutter must be numbers.')
+            return None
+        if cardW < 0 or cardH < 0 or bleed < 0 or gutter < 0 or (cardW > 0) != (cardH > 0):
+            if not quiet:
+                self.statusVar.set('Card width and height must both be positive or both 0.')
+            return None
+        if self.cropMarksVar.get() == 0:
+            cropMarks = False
+        else:
+            cropMarks = True
         # week numbers
         if self.weekNrVar.get() == 0:
             weekNr = False
@@ -877,50 +2239,169 @@ class TkCalendar(Frame):
             drawImg = False
         else:
             drawImg = True
-        # holidays
-        if self.holidaysVar.get() == 0: 
-            holidaysList = list()
-        else:
-            hol = calcHolidays(year)                      
-            holidaysList = hol.importHolidays()
-
-            x = 0
-            y = len(holidaysList)
-            while x < y:
-                if ((holidaysList[x][0] == year and int(holidaysList[x][1]) < stmonth) or
-                    (holidaysList[x][0] == year+1 and int(holidaysList[x][1]) >= stmonth)):
-                    del holidaysList[x] # delete holidays not needed and reset counters
-                    x = x - 1
-                    y = y - 1
-                x = x + 1
-            holidaysList.sort(key = lambda i: int(i[2])) # sort on day
-            holidaysList.sort(key = lambda i: int(i[1])) # sort on month
-            holidaysList.sort(key = lambda i: i[0]) # sort on year
         # draw legend (holiday texts)
         if self.legendVar.get() == 0:
             drawLegend = False
         else:
             drawLegend = True
+        # clone month layout
+        if self.cloneVar.get() == 0:
+            cloneMonths = False
+        else:
+            cloneMonths = True
+        # weekend days
+        weekendMask = dict(weekendMasks)[self.weekendVar.get()]
+        # moon phases and sunrise / sunset
+        if self.moonVar.get() == 0:
+            moonPhases = False
+        else:
+            moonPhases = True
+        location = dict((x[0], x) for x in locations).get(self.sunVar.get())
+        return dict(year=year, months=months, nrHmonths=nrHmonths,
+            firstDay=self.weekVar.get(), weekNr=weekNr, weekNrHd=self.weekNrHdVar.get(),
+            offsetX=offsetX, marginX=marginX, offsetY=offsetY, marginY=marginY,
+            drawImg=drawImg, drawLegend=drawLegend, cFont=self.font, lang=self.lang,
+            cloneMonths=cloneMonths, cardW=cardW, cardH=cardH, bleed=bleed, gutter=gutter,
+            cropMarks=cropMarks, weekendMask=weekendMask, moonPhases=moonPhases,
+            location=location, pageSize=pageSize, pageMargins=pageMargins)
+
+    def schedulePreview(self, *args):
+        """ Redraw the preview shortly after the last change of a field. """
+        if self.previewJob is not None:
+            self.after_cancel(self.previewJob)
+        self.previewJob = self.after(50, self.drawPreview)
+
+    def drawPreview(self):
+        """ Draw the calendar grid on the preview canvas, with the same
+            geometry as the Scribus calendar. Nothing is sent to Scribus. """
+        self.previewJob = None
+        options = self.readOptions(quiet=True)
+        if options is None:
+            return
+        cal = ScYearCalendar(holidaysList=self.holidaysList, holidayIndex=self.holidayIndex,
+            **options)
+        pageX, pageY = cal.pageSize
+        marginT, marginL, marginR, marginB = cal.pageMargins
+        area = (marginL, marginT, pageX - marginL - marginR, pageY - marginT - marginB)
+        cards = []
+        if cal.cardW > 0:
+            cards = cal.cardSlots(*area)
+            if len(cards) == 0:
+                self.statusVar.set('The card does not fit within the page margins')
+                return
+            cal.setupLayout(cards[0][0], cards[0][1], cal.cardW, cal.cardH)
+        else:
+            cal.setupLayout(*area)
+        canvas = self.previewCanvas
+        canvas.delete('all')
+        scale = min((int(canvas['width']) - 8) / pageX, (int(canvas['height']) - 8) / pageY)
+        def box(x, y, w, h):
+            return (4 + x * scale, 4 + y * scale, 4 + (x + w) * scale, 4 + (y + h) * scale)
+        canvas.create_rectangle(box(0, 0, pageX, pageY), fill="white", outline="black")
+        canvas.create_rectangle(box(marginL, marginT, area[2], area[3]),
+            outline="blue", dash=(2, 2))
+        for x, y in cards: # the other cards are copies of the first one
+            canvas.create_rectangle(box(x - cal.bleed, y - cal.bleed, cal.cardW + 2 * cal.bleed,
+                cal.cardH + 2 * cal.bleed), outline="red", dash=(2, 2))
+            canvas.create_rectangle(box(x, y, cal.cardW, cal.cardH), outline="gray50")
+        if cal.cropMarks and cards:
+            for x1, y1, x2, y2 in cal.cropMarkLines(cards):
+                canvas.create_line(box(x1, y1, x2 - x1, y2 - y1))
+        if cal.drawImg:
+            for img in cal.imgBoxes():
+                canvas.create_rectangle(box(*img), fill="gray90", outline="gray50")
+        for year, month, rowCnt, colCnt in cal.monthLayout():
+            for cell in cal.monthCells(year, month, rowCnt, colCnt):
+                canvas.create_rectangle(box(cell.x, cell.y, cell.w, cell.h),
+                    fill=colorHex(cell.fill), outline=colorHex(cal.lineStyleColors[cell.lineStyle]))
+        if cal.drawLegend:
+            x, y, w, h, columns, gap = cal.legendBox()
+            colWidth = (w - (columns - 1) * gap) / columns
+            for i in range(columns):
+                canvas.create_rectangle(box(x + i * (colWidth + gap), y, colWidth, h),
+                    fill="lightyellow", outline="gray50")
+
+    def okButton_pressed(self):
+        """ User variables testing and preparing """
+        options = self.readOptions()
+        if options is None:
+            return
+        # fonts
+        fonts = getFontNames()
+        if self.font not in fonts:
+            self.statusVar.set('Please select a font.')
+            return
+        # holidays
+        if self.holidaysVar.get() == 0: 
+            holidaysList = list()
+            holidayIndex = None
+        else:
+            if len(self.holidaysFiles()) == 0:
+                self.statusVar.set('Browse for the holidays file(s) or uncheck "Show holidays".')
+                return
+            if self.holidaysThread is not None:
+                self.holidaysThread.join() # usually read long before OK is pressed
+            self.checkHolidays(poll=False)
+            if self.holidaysLoaded != self.holidaysToken: # not started, read them now
+                self.scheduleHolidays()
+                if self.holidaysThread is None:
+                    self.statusVar.set('The holidays could not be read.')
+                    return
+                self.holidaysThread.join()
+                self.checkHolidays(poll=False)
+            holidaysList = self.holidaysList
+            holidayIndex = self.holidayIndex
         # create calendar (finally)
-        cal = ScYearCalendar(year, months, nrHmonths, self.weekVar.get(), weekNr, 
-                self.weekNrHdVar.get(), float(self.offsetXVar.get()), 
-                float(self.marginXVar.get()), float(self.offsetYVar.get()),
-                float(self.marginYVar.get()), drawImg, drawLegend,
-                self.font, self.lang, holidaysList)
-        self.master.withdraw()
+        cal = ScYearCalendar(holidaysList=holidaysList, holidayIndex=holidayIndex,
+            onProgress=self.drawProgress, **options)
+        # the dialog stays open while drawing: its Cancel button stops the calendar
+        self.cancelRequested = False
+        self.setInputState(DISABLED) # no language, option or file changes while drawing
+        self.cancelButton.configure(command=self.cancelDrawing)
+        self.master.protocol("WM_DELETE_WINDOW", self.cancelDrawing)
         err = cal.createCalendar()
         if err != None:
-            self.master.deiconify()
+            self.setInputState(NORMAL)
+            self.cancelButton.configure(command=self.quit)
+            self.master.protocol("WM_DELETE_WINDOW", self.quit)
             self.statusVar.set(err)
         else:
             self.quit()
 
+    def drawProgress(self, done, total):
+        """ Called between the chunks of drawing: show the progress, handle the
+            Cancel button and return True if the calendar is cancelled. """
+        self.statusVar.set('Drawing cell %d of %d, press Cancel to stop' % (done, total))
+        self.update()
+        return self.cancelRequested
+
+    def setInputState(self, state, widgets=None):
+        """ Enable (NORMAL) or disable (DISABLED) all input widgets of the dialog,
+            except the Cancel button. """
+        if widgets is None:
+            widgets = self.winfo_children()
+        for widget in widgets:
+            if widget is self.cancelButton or isinstance(widget, (Label, Canvas)):
+                continue
+            if isinstance(widget, Frame):
+                self.setInputState(state, widget.winfo_children())
+                continue
+            try:
+                widget.configure(state=state)
+            except TclError: # e.g. a scrollbar has no state
+                pass
+
+    def cancelDrawing(self):
+        self.cancelRequested = True
+
     def quit(self):
         self.master.destroy()
 
 ######################################################
 def main():
     """ Application/Dialog loop with Scribus sauce around """
+    if not checkEnvironment():
+        sys.exit(1)
     try:
         statusMessage('Running script...')
         progressReset()
@@ -937,6 +2418,88 @@ def main():
         statusMessage('Done.')
         progressReset()
 
+def commandLine(argv):
+    """ Write calendars as SVG / PDF without Scribus, e.g.
+        python YearCalendar.py --year 2025 --svg calendar.svg """
+    import argparse
+    parser = argparse.ArgumentParser(description="Year calendar as SVG or PDF, without Scribus.")
+    parser.add_argument("--year", type=int, default=datetime.date.today().year + 1)
+    parser.add_argument("--start-month", type=int, default=1, choices=range(1, 13))
+    parser.add_argument("--months-per-row", type=int, default=3, choices=range(1, 13))
+    weekdays = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    parser.add_argument("--week-start", choices=weekdays, default="mon")
+    parser.add_argument("--weekend", nargs="*", choices=weekdays, default=["sat", "sun"],
+        metavar="DAY", help="weekend days, default sat sun")
+    parser.add_argument("--no-week-numbers", action="store_true")
+    parser.add_argument("--week-heading", default="wk")
+    parser.add_argument("--offset", type=float, nargs=2, default=(0.0, 0.0), metavar=("X", "Y"),
+        help="calendar offset from the left and top margin (pt)")
+    parser.add_argument("--inner-margin", type=float, nargs=2, default=(0.0, 0.0),
+        metavar=("X", "Y"), help="inner vertical and horizontal margin (pt)")
+    parser.add_argument("--page", type=float, nargs=2, default=(595.28, 841.89),
+        metavar=("WIDTH", "HEIGHT"), help="page size (pt), default A4")
+    parser.add_argument("--margins", type=float, nargs=4, default=(40.0, 40.0, 40.0, 40.0),
+        metavar=("TOP", "LEFT", "RIGHT", "BOTTOM"), help="page margins (pt)")
+    parser.add_argument("--holidays", nargs="+", default=[], metavar="FILE",
+        help="holidays.txt or .ics files, later files take precedence")
+    parser.add_argument("--no-legend", action="store_true", help="no holiday texts")
+    parser.add_argument("--font", default="Symbola Regular")
+    parser.add_argument("--lang", default="English", choices=[x[0] for x in localization])
+    parser.add_argument("--card", type=float, nargs=2, default=(0.0, 0.0),
+        metavar=("WIDTH", "HEIGHT"), help="fill the page with cards of this size (pt)")
+    parser.add_argument("--bleed", type=float, default=0.0)
+    parser.add_argument("--gutter", type=float, default=0.0)
+    parser.add_argument("--crop-marks", action="store_true")
+    parser.add_argument("--moon", action="store_true", help="moon phases in the date cells")
+    parser.add_argument("--sun", choices=[x[0] for x in locations], metavar="PLACE",
+        help="sunrise and sunset of a place of the locations list in the month headings")
+    parser.add_argument("--svg", metavar="FILE")
+    parser.add_argument("--pdf", metavar="FILE")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="N",
+        help="time N calendars (SVG in memory) and print the time per calendar")
+    args = parser.parse_args(argv)
+    if not args.svg and not args.pdf and not args.benchmark:
+        parser.error("give --svg, --pdf and / or --benchmark")
+    if args.lang != "English":
+        try:
+            setCalendarLocale(args.lang)
+        except locale.Error:
+            print("Language " + args.lang + " is not installed on your operating system.")
+    months = [(args.start_month - 1 + i) % 12 + 1 for i in range(12)]
+    holidaysList = list()
+    if args.holidays:
+        hol = calcHolidays(args.year)
+        holidaysList = hol.selectHolidays(hol.importHolidays(args.holidays), args.start_month)
+    options = dict(months=months, nrHmonths=args.months_per_row,
+        firstDay=weekdays.index(args.week_start),
+        weekendMask=sum(1 << weekdays.index(day) for day in set(args.weekend)),
+        weekNr=not args.no_week_numbers, weekNrHd=args.week_heading,
+        offsetX=args.offset[0], marginX=args.inner_margin[0], offsetY=args.offset[1],
+        marginY=args.inner_margin[1], drawImg=False, drawLegend=not args.no_legend,
+        cFont=args.font, lang=args.lang, holidaysList=holidaysList, cardW=args.card[0],
+        cardH=args.card[1], bleed=args.bleed, gutter=args.gutter, cropMarks=args.crop_marks,
+        moonPhases=args.moon, location=dict((x[0], x) for x in locations).get(args.sun),
+        pageSize=args.page, pageMargins=args.margins)
+    if args.benchmark:
+        print("Script loaded in %.1f ms, tkinter %sloaded" % (loadTime * 1000,
+            "" if "tkinter" in sys.modules else "not "))
+        start = time.time()
+        for i in range(args.benchmark):
+            cal = SvgYearCalendar(args.year, **options)
+            err = cal.createCalendar()
+            if err is None:
+                cal.svgText()
+        print("%.2f ms per calendar" % ((time.time() - start) * 1000 / args.benchmark))
+    else:
+        err = SvgYearCalendar(args.year, **options).createCalendar(args.svg, args.pdf)
+    if err is not None:
+        print(err)
+        return 1
+    return 0
+
+loadTime = time.perf_counter() - loadStart # imports and definitions of this script
+
 if __name__ == '__main__':
+    if not inScribus:
+        sys.exit(commandLine(sys.argv[1:]))
     main()
-